@@ -1,57 +1,311 @@
-import shutil
+import io
+import json
+import hmac
 from bson import json_util
-from flask import request, send_file, after_this_request, jsonify
+from flask import request, send_file, jsonify, Response
 from config import app, aws_auth
-from decoders.decoder import Decoder
-from parsers.style_parser import StyleParser
-from parsers.syntax_parser import SyntaxParser
-from generators.java_generator import JavaCodeGenerator
+from decoders.decoder import DiagramTooLargeError
+from generators.inheritance import InheritanceCycleError
+from pipelines.code_pipeline import CodePipeline, PAGES
 from database.repository import Repository
+from jobs.job_store import JobStore
+from jobs.job_runner import JobRunner, JobError
+from utilities.cache import ResultCache, cache_key
+from utilities.single_flight import SingleFlight, IdempotencyConflictError
+from utilities.pool import ProcessPool
+from utilities.metrics import metrics
+from utilities.profiling import Profiler
 from utilities.security import get_user_projects
+from utilities.upload import read_upload, UploadError
+from utilities.utility import archive_folder, files_to_zip, zip_to_files
+
+code_cache = ResultCache(
+    "code",
+    app.config["CODE_CACHE_MAX_BYTES"],
+    app.config["CODE_CACHE_DIR"],
+    app.config["CODE_CACHE_DISK_MAX_BYTES"],
+)
+class_cache = ResultCache(
+    "classes",
+    app.config["CLASS_CACHE_MAX_BYTES"],
+    app.config["CLASS_CACHE_DIR"],
+    app.config["CLASS_CACHE_DISK_MAX_BYTES"],
+)
+metrics.configure(app.config["METRICS_DIR"])
+single_flight = SingleFlight(app.config["SINGLE_FLIGHT_DIR"])
+batch_pool = ProcessPool(app.config["BATCH_WORKERS"])
+profiler = Profiler(
+    app.config["PROFILE_DIR"],
+    app.config["PROFILE_TOKEN"],
+    app.config["PROFILE_SAMPLE_RATE"],
+    app.config["MEMORY_PROFILE"],
+)
+job_store = JobStore(app.config["JOBS_DIR"])
+job_runner = JobRunner(
+    app, job_store, app.config["JOB_WORKERS"], app.config["JOB_MAX_PENDING"]
+)
+
+
+@app.after_request
+def flush_metrics(response):
+    metrics.flush()
+    return response
+
+
+@app.errorhandler(IdempotencyConflictError)
+def idempotency_conflict(e):
+    return "Idempotency-Key was already used for another request", 422
+
+
+def current_user():
+    """
+    Get the id of the authenticated user
+    """
+
+    return aws_auth.claims.get("sub") if aws_auth.claims else None
+
+
+def request_key(scope, *parts):
+    """
+    Get the key for coalescing identical requests
+
+    Parameters:
+        scope: name of the endpoint
+        parts: the request inputs that identify the result
+
+    Returns:
+        key: the Idempotency-Key of the client if provided, otherwise the hash of the inputs
+        ttl: seconds the result is kept for retries of the same request
+        inputs: the hash of the inputs kept with the result of an Idempotency-Key, otherwise None
+    """
+
+    inputs = cache_key(scope, *parts)
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key:
+        return (
+            cache_key("idempotency", scope, current_user(), idempotency_key),
+            app.config["IDEMPOTENCY_TTL"],
+            inputs,
+        )
+
+    return inputs, 0, None
+
+
+def code_pipeline(pages="merge"):
+    """
+    Get the code pipeline with the configured parsing and size limits
+
+    Parameters:
+        pages: how the pages of the diagram are generated, merged or split
+    """
+
+    return CodePipeline(
+        code_cache,
+        app.config["STYLE_PARSER"],
+        app.config["PIPELINE_MODE"],
+        {
+            "max_input_bytes": app.config["DIAGRAM_MAX_BYTES"],
+            "max_xml_bytes": app.config["DIAGRAM_MAX_XML_BYTES"],
+            "max_pages": app.config["DIAGRAM_MAX_PAGES"],
+        },
+        pages,
+        batch_pool,
+        {
+            "workers": app.config["CODEGEN_WORKERS"],
+            "min_classes": app.config["CODEGEN_MIN_CLASSES"],
+        },
+        class_cache,
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    token = app.config["METRICS_TOKEN"]
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return "Not allowed to read the metrics", 403
+
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    if not profiler.enabled or not profiler.is_admin("X-Profile"):
+        return "Not allowed to read the profiles", 403
+
+    path = profiler.path(profile_id)
+    if not path:
+        return "Profile not found", 404
+
+    if request.args.get("format") == "text":
+        return Response(profiler.summary(path), mimetype="text/plain")
+
+    return send_file(
+        path,
+        mimetype="application/octet-stream",
+        as_attachment=True,
+        download_name=f"{profile_id}.pstats",
+    )
+
+
+@app.route("/api/profiles/<profile_id>/memory", methods=["GET"])
+def get_memory_profile(profile_id):
+    if not profiler.enabled or not profiler.is_admin("X-Profile"):
+        return "Not allowed to read the profiles", 403
+
+    path = profiler.path(profile_id, "memory.json")
+    if not path:
+        return "Profile not found", 404
+
+    return send_file(path, mimetype="application/json")
 
 
 @app.route("/api/generate-code", methods=["POST"])
 @aws_auth.authentication_required
+@profiler.profiled
 def generate_code():
-    @after_this_request
-    def _(response):
-        shutil.rmtree("temp", ignore_errors=True)
-        return response
-
     try:
-        encoded_xml = request.json["data"]
-    except:
-        return "No data provided", 400
+        encoded_xml, metadata = read_upload(request, app.config["DIAGRAM_MAX_BYTES"])
+    except UploadError as e:
+        return str(e), e.status
+    except DiagramTooLargeError as e:
+        return f"Diagram too large: {e}", 413
+
+    diagram_id, diagram_title = metadata["id"], metadata["title"]
+    if diagram_id is None or diagram_title is None:
+        return "No diagram id or title provided", 400
 
-    decoded_xml = Decoder().convert(encoded_xml)
-    style_tree = StyleParser().parse(decoded_xml)
-    syntax_tree = SyntaxParser().parse(style_tree)
-    code = JavaCodeGenerator().generate_code(syntax_tree, "temp/code")
+    pages = metadata["pages"] or "merge"
+    if pages not in PAGES:
+        return f"Unknown pages option {pages}", 400
 
-    if not decoded_xml or not style_tree or not syntax_tree or not code:
+    pipeline = code_pipeline(pages)
+    key, ttl, inputs = request_key(
+        "generate-code", pipeline.key(encoded_xml), diagram_id
+    )
+    try:
+        syntax_tree, archive, cached = single_flight.do(
+            key, lambda: pipeline.run(encoded_xml), ttl, inputs
+        )
+    except DiagramTooLargeError as e:
+        return f"Diagram too large: {e}", 413
+    except InheritanceCycleError as e:
+        return f"Inheritance cycle between the classes {e}", 400
+    if not syntax_tree or not archive:
         return "Bad data provided", 400
 
-    diagram_id = request.json["id"]
-    diagram_title = request.json["title"]
     Repository().save_classes(diagram_id, syntax_tree)
 
-    shutil.make_archive("temp/generated-code", "zip", "temp/code")
-    return send_file(
-        "temp/generated-code.zip",
+    response = send_file(
+        io.BytesIO(archive),
+        mimetype="application/zip",
         as_attachment=True,
         download_name=f"{diagram_title}.zip",
     )
+    response.headers["X-Cache"] = "HIT" if cached else "MISS"
+    classes = pipeline.class_counts(syntax_tree)
+    response.headers["X-Classes-Regenerated"] = str(classes["regenerated"])
+    response.headers["X-Classes-Reused"] = str(classes["reused"])
+    return response
+
+
+@app.route("/api/generate-code/batch", methods=["POST"])
+@aws_auth.authentication_required
+@profiler.profiled
+def generate_code_batch():
+    diagrams = request.json
+    if not isinstance(diagrams, list) or not diagrams:
+        return "No data provided", 400
+    if len(diagrams) > app.config["BATCH_MAX_DIAGRAMS"]:
+        return f"At most {app.config['BATCH_MAX_DIAGRAMS']} diagrams per batch", 413
+
+    valid, repeated, ids = [], set(), set()
+    for i, diagram in enumerate(diagrams):
+        if (
+            not isinstance(diagram, dict)
+            or not isinstance(diagram.get("data"), str)
+            or "id" not in diagram
+        ):
+            continue
+        # the classes of a diagram id are saved once, for its first diagram
+        if str(diagram["id"]) in ids:
+            repeated.add(i)
+            continue
+        ids.add(str(diagram["id"]))
+        valid.append(i)
+
+    results = code_pipeline().run_batch(
+        [diagrams[i]["data"] for i in valid], batch_pool
+    )
+    results = dict(zip(valid, results))
+
+    files, manifest, saved = [], [], []
+    # the manifest is at the root of the archive, next to the folders
+    folders = {"manifest.json"}
+    for i, diagram in enumerate(diagrams):
+        diagram = diagram if isinstance(diagram, dict) else {}
+        entry = {"id": diagram.get("id"), "title": diagram.get("title")}
+        manifest.append(entry)
+
+        if i in repeated:
+            entry["status"] = "invalid"
+            entry["error"] = "Diagram id repeated in the batch"
+            continue
+        if i not in results:
+            entry["status"] = "invalid"
+            entry["error"] = "No data provided"
+            continue
+
+        syntax_tree, archive, cached, error = results[i]
+        if isinstance(error, DiagramTooLargeError):
+            entry["status"] = "too_large"
+            entry["error"] = f"Diagram too large: {error}"
+            continue
+        if isinstance(error, InheritanceCycleError):
+            entry["status"] = "invalid"
+            entry["error"] = f"Inheritance cycle between the classes {error}"
+            continue
+        if not syntax_tree or not archive:
+            entry["status"] = "failed"
+            entry["error"] = "Bad data provided"
+            continue
+
+        folder = archive_folder(
+            folders, [diagram.get("title"), diagram["id"]], diagram["id"]
+        )
+
+        diagram_files = zip_to_files(archive)
+        files += [[f"{folder}/{name}", contents] for name, contents in diagram_files]
+        saved.append((diagram["id"], syntax_tree))
+        entry.update(
+            status="ok", cached=cached, folder=folder, files=len(diagram_files)
+        )
+
+    Repository().save_classes_bulk(saved)
+
+    files.append(["manifest.json", json.dumps(manifest, indent=2)])
+    return send_file(
+        files_to_zip(files),
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name="generated-code.zip",
+    )
 
 
 @app.route("/api/generate-document", methods=["POST"])
 @aws_auth.authentication_required
+@profiler.profiled
 def generate_document():
     project, class_type = request.json["project"], request.json["classType"]
     projects = get_user_projects(aws_auth)
     if project not in map(lambda p: p["name"], projects):
         return "Not allowed to generate documents for this project", 403
 
-    document = Repository().save_document(project, class_type)
+    key, ttl, inputs = request_key("generate-document", project, class_type)
+    document = single_flight.do(
+        key, lambda: Repository().save_document(project, class_type), ttl, inputs
+    )
     if not document:
         return "No data available to generate document", 400
 
@@ -60,28 +314,145 @@ def generate_document():
 
 @app.route("/api/generate-graph", methods=["POST"])
 @aws_auth.authentication_required
+@profiler.profiled
 def generate_graph():
-    @after_this_request
-    def _(response):
-        shutil.rmtree("temp", ignore_errors=True)
-        return response
-
     project = request.json["project"]
     projects = get_user_projects(aws_auth)
     if project not in map(lambda p: p["name"], projects):
         return "Not allowed to generate graphs for this project", 403
 
-    graph_name = Repository().save_graph(project, "temp/graph")
+    key, ttl, inputs = request_key("generate-graph", project)
+    graph_name, graph_files = single_flight.do(
+        key, lambda: Repository().save_graph(project), ttl, inputs
+    )
     if not graph_name:
         return "No data available to generate graph", 400
 
-    shutil.make_archive(f"temp/generated-graph", "zip", "temp/graph")
     return send_file(
-        f"temp/generated-graph.zip",
+        files_to_zip(graph_files),
+        mimetype="application/zip",
         as_attachment=True,
         download_name=f"{graph_name}.zip",
     )
 
 
+def submit_job(kind, fn):
+    """
+    Submit an asynchronous job for the authenticated user
+
+    Parameters:
+        kind: the kind of the job
+        fn: the job function, see JobRunner.submit
+
+    Returns:
+        response: the id and the status url of the job
+    """
+
+    job_store.delete_expired(app.config["JOB_TTL"])
+    job_id = job_runner.submit(kind, current_user(), fn)
+    if not job_id:
+        return "Too many jobs in progress, try again later", 503
+
+    return (
+        jsonify({"id": job_id, "status": "queued"}),
+        202,
+        {"Location": f"/api/jobs/{job_id}"},
+    )
+
+
+@app.route("/api/jobs/generate-code", methods=["POST"])
+@aws_auth.authentication_required
+def submit_code_job():
+    try:
+        encoded_xml = request.json["data"]
+        diagram_id = request.json["id"]
+        diagram_title = request.json["title"]
+    except:
+        return "No data provided", 400
+
+    pages = request.json.get("pages", "merge")
+    if pages not in PAGES:
+        return f"Unknown pages option {pages}", 400
+
+    def run(progress):
+        progress("generate")
+        try:
+            syntax_tree, archive, _ = code_pipeline(pages).run(encoded_xml)
+        except DiagramTooLargeError as e:
+            raise JobError(f"Diagram too large: {e}")
+        except InheritanceCycleError as e:
+            raise JobError(f"Inheritance cycle between the classes {e}")
+        if not syntax_tree or not archive:
+            raise JobError("Bad data provided")
+
+        progress("save")
+        Repository().save_classes(diagram_id, syntax_tree)
+        return archive, f"{diagram_title}.zip"
+
+    return submit_job("generate-code", run)
+
+
+@app.route("/api/jobs/generate-graph", methods=["POST"])
+@aws_auth.authentication_required
+def submit_graph_job():
+    project = request.json["project"]
+    projects = get_user_projects(aws_auth)
+    if project not in map(lambda p: p["name"], projects):
+        return "Not allowed to generate graphs for this project", 403
+
+    def run(progress):
+        graph_name, graph_files = Repository().save_graph(project, progress)
+        if not graph_name:
+            raise JobError("No data available to generate graph")
+
+        progress("archive")
+        return files_to_zip(graph_files).getvalue(), f"{graph_name}.zip"
+
+    return submit_job("generate-graph", run)
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+@aws_auth.authentication_required
+def get_job(job_id):
+    job = job_store.get(job_id)
+    if not job or job["owner"] != current_user():
+        return "Job not found", 404
+
+    status = {
+        key: job[key]
+        for key in (
+            "id",
+            "kind",
+            "status",
+            "stage",
+            "progress",
+            "error",
+            "created_at",
+            "updated_at",
+        )
+    }
+    if job["status"] == "succeeded":
+        status["download"] = f"/api/jobs/{job_id}/download"
+
+    return jsonify(status)
+
+
+@app.route("/api/jobs/<job_id>/download", methods=["GET"])
+@aws_auth.authentication_required
+def download_job(job_id):
+    job = job_store.get(job_id)
+    if not job or job["owner"] != current_user():
+        return "Job not found", 404
+    if job["status"] != "succeeded":
+        return f"Job is {job['status']}", 409
+
+    return send_file(
+        job["artifact"],
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=job["download_name"],
+    )
+
+
 Repository().save_document_meta()
 Repository().save_graph_meta()
@@ -0,0 +1,69 @@
+import sys
+import argparse
+from decoders.decoder import Decoder
+from parsers.syntax_parser import SyntaxParser
+from parsers.streaming_parser import StreamingParser
+from pipelines.code_pipeline import STYLE_PARSERS
+from utilities.utility import read_file
+from benchmarks.synthetic_diagram import SyntheticDiagram
+from benchmarks.run_benchmarks import quiet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that every StyleParser implementation builds the same style tree,"
+        " and that the StreamingParser builds the same syntax tree"
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        default=["examples/example_diagram.drawio"],
+        help="encoded .drawio files, the example diagram by default",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        nargs="*",
+        default=[10, 100],
+        help="sizes of the synthetic diagrams that are compared too",
+    )
+    args = parser.parse_args(argv)
+
+    diagrams = [(path, read_file(path)) for path in args.files]
+    for size in args.synthetic:
+        for html in (False, True):
+            diagrams.append(
+                (
+                    f"synthetic classes={size} html={html}",
+                    SyntheticDiagram(classes=size, html=html).encoded(),
+                )
+            )
+
+    different = 0
+    for name, encoded_xml in diagrams:
+        decoded_xml = quiet(Decoder().convert, encoded_xml)
+        trees = {
+            parser_name: quiet(parser().parse, decoded_xml)
+            for parser_name, parser in STYLE_PARSERS.items()
+        }
+        reference = trees["bs4"]
+        mismatches = [
+            parser_name for parser_name, tree in trees.items() if tree != reference
+        ]
+
+        syntax_tree = quiet(SyntaxParser().parse, reference)
+        fused_tree = quiet(StreamingParser().parse, encoded_xml)
+        if (syntax_tree and syntax_tree.to_dict()) != (
+            fused_tree and fused_tree.to_dict()
+        ):
+            mismatches.append("fused")
+        different += bool(mismatches)
+        print(
+            f"{'DIFFERENT ' + ','.join(mismatches) if mismatches else 'SAME':<16} {name}"
+        )
+
+    return 1 if different else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
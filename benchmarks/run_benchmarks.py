@@ -0,0 +1,275 @@
+import io
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from contextlib import redirect_stdout, redirect_stderr
+from decoders.decoder import Decoder
+from parsers.syntax_parser import SyntaxParser
+from parsers.streaming_parser import StreamingParser
+from generators.java_generator import JavaCodeGenerator
+from pipelines.code_pipeline import STYLE_PARSERS, MODES
+from benchmarks.synthetic_diagram import SyntheticDiagram
+
+
+def stages(style_parser="bs4", mode="staged", codegen_workers=0):
+    """
+    Get the benchmarked stages of the pipeline
+
+    Parameters:
+        style_parser: name of the StyleParser implementation
+        mode: how the diagram is parsed, see MODES
+        codegen_workers: number of processes that generate the classes, 0 for none
+
+    Returns:
+        stages: list of (name, function) pairs, every function takes the output of the previous one
+    """
+
+    def generate(data):
+        generator = JavaCodeGenerator(workers=codegen_workers, min_classes=0)
+        return generator.generate_sources(data)
+
+    if mode == "fused":
+        return [
+            ("fused_parse", lambda data: StreamingParser().parse(data)),
+            ("generate", generate),
+        ]
+
+    return [
+        ("decode", lambda data: Decoder().convert(data)),
+        ("style_parse", lambda data: STYLE_PARSERS[style_parser]().parse(data)),
+        ("syntax_parse", lambda data: SyntaxParser().parse(data)),
+        ("generate", generate),
+    ]
+
+
+def git_commit():
+    """
+    Get the commit of the benchmarked tree
+
+    Returns:
+        commit: the commit hash, None outside of a git checkout
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def quiet(fn, data):
+    """
+    Run a stage with its banners and error traces discarded
+
+    Parameters:
+        fn: the function of the stage
+        data: the input of the stage
+
+    Returns:
+        result: the output of the stage
+    """
+
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        return fn(data)
+
+
+def benchmark_size(
+    diagram, repeat, style_parser="bs4", mode="staged", codegen_workers=0
+):
+    """
+    Benchmark the stages of the pipeline on one diagram
+
+    Parameters:
+        diagram: the SyntheticDiagram to be benchmarked
+        repeat: number of timed runs of every stage
+        style_parser: name of the StyleParser implementation
+        mode: how the diagram is parsed
+        codegen_workers: number of processes that generate the classes, 0 for none
+
+    Returns:
+        result: dictionary of the diagram size and the stage measurements
+    """
+
+    data = diagram.encoded()
+    classes = diagram.classes + diagram.interfaces + diagram.inner_classes
+    result = {
+        "classes": classes,
+        "input_bytes": len(data),
+        "stages": dict(),
+    }
+
+    for stage, fn in stages(style_parser, mode, codegen_workers):
+        output = quiet(fn, data)
+        if output is False or output is None:
+            result["stages"][stage] = {"failed": True}
+            break
+
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            quiet(fn, data)
+            seconds.append(time.perf_counter() - start)
+
+        # tracemalloc slows the stage down, so the memory is measured in its own run
+        tracemalloc.start()
+        quiet(fn, data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        median = statistics.median(seconds)
+        result["stages"][stage] = {
+            "failed": False,
+            "seconds_min": min(seconds),
+            "seconds_median": median,
+            "classes_per_second": classes / median if median else None,
+            "peak_bytes": peak,
+        }
+
+        if stage == "decode":
+            result["xml_bytes"] = len(output)
+        data = output
+
+    return result
+
+
+def compare(results, baseline_path):
+    """
+    Print the speedup of the results over a previous run
+
+    Parameters:
+        results: the results of this run
+        baseline_path: path of the JSON results of the previous run
+    """
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    previous = {r["classes"]: r["stages"] for r in baseline["results"]}
+    print(f"\nCompared to {baseline.get('commit') or baseline_path}:")
+    for result in results["results"]:
+        stages = previous.get(result["classes"])
+        if stages is None:
+            continue
+        for stage, measurement in result["stages"].items():
+            before = stages.get(stage)
+            if not before or before["failed"] or measurement["failed"]:
+                continue
+            speedup = before["seconds_median"] / measurement["seconds_median"]
+            memory = measurement["peak_bytes"] / max(before["peak_bytes"], 1)
+            print(
+                f"{result['classes']:>8} {stage:<14} {speedup:>7.2f}x time"
+                f" {memory:>7.2f}x peak memory"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the code generation pipeline stage by stage on synthetic diagrams"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 50, 100, 250, 500],
+        help="numbers of classes of the benchmarked diagrams",
+    )
+    parser.add_argument("--properties", type=int, default=3)
+    parser.add_argument("--methods", type=int, default=3)
+    parser.add_argument("--inheritance-depth", type=int, default=3)
+    parser.add_argument(
+        "--interfaces",
+        type=float,
+        default=0.1,
+        help="interfaces per class",
+    )
+    parser.add_argument(
+        "--inner-classes",
+        type=float,
+        default=0.1,
+        help="inner classes per class",
+    )
+    parser.add_argument("--associations", type=float, default=1.0)
+    parser.add_argument("--aggregations", type=float, default=0.5)
+    parser.add_argument("--compositions", type=float, default=0.5)
+    parser.add_argument("--html", action="store_true", help="use HTML class cells")
+    parser.add_argument("--style-parser", choices=sorted(STYLE_PARSERS), default="bs4")
+    parser.add_argument("--mode", choices=MODES, default="staged")
+    parser.add_argument(
+        "--codegen-workers",
+        type=int,
+        default=0,
+        help="processes that generate the classes, 0 to generate them serially",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="path of the JSON results")
+    parser.add_argument("--compare", help="path of the JSON results of a previous run")
+    args = parser.parse_args(argv)
+
+    config = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("sizes", "output", "compare")
+    }
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": [],
+    }
+
+    print(
+        f"{'classes':>8} {'stage':<14} {'median s':>10} {'classes/s':>12} {'peak MB':>9}"
+    )
+    for size in args.sizes:
+        diagram = SyntheticDiagram(
+            classes=size,
+            properties=args.properties,
+            methods=args.methods,
+            inheritance_depth=args.inheritance_depth,
+            interfaces=max(round(size * args.interfaces), 1),
+            inner_classes=round(size * args.inner_classes),
+            associations=args.associations,
+            aggregations=args.aggregations,
+            compositions=args.compositions,
+            html=args.html,
+            seed=args.seed,
+        )
+        result = benchmark_size(
+            diagram, args.repeat, args.style_parser, args.mode, args.codegen_workers
+        )
+        results["results"].append(result)
+
+        for stage, measurement in result["stages"].items():
+            if measurement["failed"]:
+                print(f"{result['classes']:>8} {stage:<14} {'FAILED':>10}")
+                continue
+            print(
+                f"{result['classes']:>8} {stage:<14}"
+                f" {measurement['seconds_median']:>10.4f}"
+                f" {measurement['classes_per_second']:>12.1f}"
+                f" {measurement['peak_bytes'] / 2**20:>9.2f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import zlib
+import base64
+import random
+from urllib.parse import quote
+from xml.sax.saxutils import quoteattr
+
+CLASS_STYLE = "swimlane;fontStyle={font_style};align=center;verticalAlign=top;childLayout=stackLayout;horizontal=1;startSize=26;horizontalStack=0;resizeParent=1;resizeLast=0;collapsible=1;marginBottom=0;rounded=0;shadow=0;strokeWidth=1;"
+HTML_CLASS_STYLE = "verticalAlign=top;align=left;overflow=fill;fontSize=12;fontFamily=Helvetica;html=1;{font_style}"
+MEMBER_STYLE = "text;align=left;verticalAlign=top;spacingLeft=4;spacingRight=4;overflow=hidden;rotatable=0;points=[[0,0.5],[1,0.5]];portConstraint=eastwest;"
+ABSTRACT_MEMBER_STYLE = MEMBER_STYLE + "fontStyle=2"
+LINE_STYLE = "line;html=1;strokeWidth=1;align=left;verticalAlign=middle;spacingTop=-1;spacingLeft=3;spacingRight=3;rotatable=0;labelPosition=right;points=[];portConstraint=eastwest;"
+
+EDGE_STYLES = {
+    "extends": "endArrow=block;endSize=16;endFill=0;html=1;",
+    "implements": "endArrow=block;dashed=1;endFill=0;endSize=12;html=1;",
+    "association": "endArrow=none;html=1;",
+    "aggregation": "endArrow=open;html=1;endSize=12;startArrow=diamondThin;startSize=14;startFill=0;",
+    "composition": "endArrow=open;html=1;endSize=12;startArrow=diamondThin;startSize=14;startFill=1;",
+    "inner": "endArrow=open;startArrow=circlePlus;endFill=0;startFill=0;endSize=8;html=1;",
+}
+
+TYPES = ["int", "double", "boolean", "String", "long"]
+
+
+class SyntheticDiagram:
+    """
+    Synthesize encoded .drawio class diagrams of a configurable size and shape
+    """
+
+    def __init__(
+        self,
+        classes=10,
+        properties=3,
+        methods=3,
+        inheritance_depth=3,
+        interfaces=2,
+        inner_classes=1,
+        associations=1.0,
+        aggregations=0.5,
+        compositions=0.5,
+        html=False,
+        seed=0,
+    ):
+        """
+        Parameters:
+            classes: number of classes, not counting the interfaces and inner classes
+            properties: number of properties per class
+            methods: number of methods per class and interface
+            inheritance_depth: length of the extends chains, 1 for no inheritance
+            interfaces: number of interfaces, implemented by the roots of the chains
+            inner_classes: number of inner classes, attached to random classes
+            associations: number of association edges per class
+            aggregations: number of aggregation edges per class
+            compositions: number of composition edges per class
+            html: use HTML formatted class cells instead of swimlanes with rows
+            seed: seed of the random relationships
+        """
+
+        self.classes = classes
+        self.properties = properties
+        self.methods = methods
+        self.inheritance_depth = max(inheritance_depth, 1)
+        self.interfaces = interfaces
+        self.inner_classes = inner_classes
+        self.relationship_mix = {
+            "association": associations,
+            "aggregation": aggregations,
+            "composition": compositions,
+        }
+        self.html = html
+        self.seed = seed
+
+    def xml(self):
+        """
+        Build the diagram XML
+
+        Returns:
+            xml: the mxGraphModel XML of the diagram
+        """
+
+        rng = random.Random(self.seed)
+        cells = ['<mxCell id="0"/>', '<mxCell id="1" parent="0"/>']
+        edges = []
+
+        interface_ids = [f"i{i}" for i in range(self.interfaces)]
+        for i, interface_id in enumerate(interface_ids):
+            cells += self._class_cells(
+                interface_id, f"<<Interface>>\nInterface{i}", False, 0, self.methods
+            )
+
+        class_ids = [f"c{i}" for i in range(self.classes)]
+        for i, class_id in enumerate(class_ids):
+            chain_position = i % self.inheritance_depth
+            is_root = chain_position == 0
+            abstract = is_root and self.inheritance_depth > 1
+            cells += self._class_cells(
+                class_id, f"Class{i}", abstract, self.properties, self.methods
+            )
+
+            if not is_root:
+                edges.append(("extends", class_id, class_ids[i - 1]))
+            elif interface_ids:
+                edges.append(
+                    ("implements", class_id, interface_ids[i % len(interface_ids)])
+                )
+
+        inner_ids = [f"n{i}" for i in range(self.inner_classes)]
+        for i, inner_id in enumerate(inner_ids):
+            cells += self._class_cells(inner_id, f"Inner{i}", False, self.properties, 0)
+            if class_ids:
+                edges.append(("inner", rng.choice(class_ids), inner_id))
+
+        for kind, per_class in self.relationship_mix.items():
+            if len(class_ids) < 2:
+                break
+            for _ in range(round(per_class * len(class_ids))):
+                source, target = rng.sample(class_ids, 2)
+                edges.append((kind, source, target))
+
+        for i, (kind, source, target) in enumerate(edges):
+            cells.append(
+                f'<mxCell id="e{i}" value="" style="{EDGE_STYLES[kind]}" parent="1" source="{source}" target="{target}" edge="1"><mxGeometry relative="1" as="geometry"/></mxCell>'
+            )
+
+        return (
+            '<mxGraphModel dx="1000" dy="1000" grid="1" gridSize="10"><root>'
+            + "".join(cells)
+            + "</root></mxGraphModel>"
+        )
+
+    def encoded(self):
+        """
+        Build the encoded .drawio file content, compressed like draw.io does
+
+        Returns:
+            encoded_xml: the .drawio file content
+        """
+
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+        quoted = quote(self.xml(), safe="~()*!.'").encode("utf8")
+        compressed = compressor.compress(quoted) + compressor.flush()
+        diagram = base64.b64encode(compressed).decode("ascii")
+
+        return (
+            '<mxfile host="benchmark" type="device">'
+            f'<diagram id="synthetic" name="Page-1">{diagram}</diagram>'
+            "</mxfile>"
+        )
+
+    def _class_cells(self, class_id, name, abstract, properties, methods):
+        """
+        Build the cells of a class
+
+        Parameters:
+            class_id: the id of the class cell
+            name: the label of the class
+            abstract: True if the class and its first method are abstract
+            properties: number of properties
+            methods: number of methods
+
+        Returns:
+            cells: list of the cell XML strings
+        """
+
+        property_labels = [
+            f"{'-+#'[p % 3]} property{p}: {TYPES[p % len(TYPES)]}"
+            for p in range(properties)
+        ]
+        method_labels = [
+            f"+ method{m}(argument{m}: {TYPES[m % len(TYPES)]}): {TYPES[(m + 1) % len(TYPES)]}"
+            for m in range(methods)
+        ]
+        geometry = '<mxGeometry width="200" height="100" as="geometry"/>'
+
+        if self.html:
+            value = (
+                f'<p style="margin:0px;margin-top:4px;text-align:center;"><b>{name.replace(chr(10), "")}</b></p>'
+                f'<hr size="1"/><p style="margin:0px;margin-left:4px;">{"<br>".join(property_labels)}</p>'
+                f'<hr size="1"/><p style="margin:0px;margin-left:4px;">{"<br>".join(method_labels)}</p>'
+            )
+            style = HTML_CLASS_STYLE.format(
+                font_style="fontStyle=2;" if abstract else ""
+            )
+            return [
+                f'<mxCell id="{class_id}" value={self._attr(value)} style="{style}" parent="1" vertex="1">{geometry}</mxCell>'
+            ]
+
+        style = CLASS_STYLE.format(font_style=2 if abstract else 0)
+        cells = [
+            f'<mxCell id="{class_id}" value={self._attr(name)} style="{style}" parent="1" vertex="1">{geometry}</mxCell>'
+        ]
+        for p, label in enumerate(property_labels):
+            cells.append(
+                f'<mxCell id="{class_id}-p{p}" value={self._attr(label)} style="{MEMBER_STYLE}" parent="{class_id}" vertex="1">{geometry}</mxCell>'
+            )
+        cells.append(
+            f'<mxCell id="{class_id}-line" value="" style="{LINE_STYLE}" parent="{class_id}" vertex="1">{geometry}</mxCell>'
+        )
+        for m, label in enumerate(method_labels):
+            interface = name.startswith("<<Interface>>")
+            member_style = (
+                ABSTRACT_MEMBER_STYLE
+                if interface or (abstract and m == 0)
+                else MEMBER_STYLE
+            )
+            cells.append(
+                f'<mxCell id="{class_id}-m{m}" value={self._attr(label)} style="{member_style}" parent="{class_id}" vertex="1">{geometry}</mxCell>'
+            )
+
+        return cells
+
+    def _attr(self, value):
+        return quoteattr(value, {"\n": "&#10;"})
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from flask import Flask
 from flask_cors import CORS
 from flask_awscognito import AWSCognitoAuthentication
@@ -31,7 +32,64 @@ app.config["AWS_COGNITO_USER_POOL_CLIENT_SECRET"] = os.getenv(
 )
 app.config["AWS_COGNITO_REDIRECT_URL"] = os.getenv("AWS_COGNITO_REDIRECT_URL")
 
-CORS(app, expose_headers=["Content-Disposition"])
+app.config["CODE_CACHE_MAX_BYTES"] = int(
+    os.getenv("CODE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+)
+app.config["CODE_CACHE_DIR"] = os.getenv("CODE_CACHE_DIR")
+app.config["CODE_CACHE_DISK_MAX_BYTES"] = int(
+    os.getenv("CODE_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024)
+)
+app.config["CLASS_CACHE_MAX_BYTES"] = int(
+    os.getenv("CLASS_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+)
+app.config["CLASS_CACHE_DIR"] = os.getenv("CLASS_CACHE_DIR")
+app.config["CLASS_CACHE_DISK_MAX_BYTES"] = int(
+    os.getenv("CLASS_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024)
+)
+app.config["SINGLE_FLIGHT_DIR"] = os.getenv(
+    "SINGLE_FLIGHT_DIR",
+    os.path.join(tempfile.gettempdir(), "generator-service", "single-flight"),
+)
+app.config["IDEMPOTENCY_TTL"] = int(os.getenv("IDEMPOTENCY_TTL", 600))
+app.config["STYLE_PARSER"] = os.getenv("STYLE_PARSER", "bs4")
+app.config["PIPELINE_MODE"] = os.getenv("PIPELINE_MODE", "staged")
+app.config["DIAGRAM_MAX_BYTES"] = int(os.getenv("DIAGRAM_MAX_BYTES", 16 * 1024 * 1024))
+app.config["DIAGRAM_MAX_XML_BYTES"] = int(
+    os.getenv("DIAGRAM_MAX_XML_BYTES", 64 * 1024 * 1024)
+)
+app.config["DIAGRAM_MAX_PAGES"] = int(os.getenv("DIAGRAM_MAX_PAGES", 100))
+app.config["CODEGEN_WORKERS"] = int(os.getenv("CODEGEN_WORKERS", 0))
+app.config["CODEGEN_MIN_CLASSES"] = int(os.getenv("CODEGEN_MIN_CLASSES", 1000))
+app.config["BATCH_WORKERS"] = int(os.getenv("BATCH_WORKERS", os.cpu_count() or 1))
+app.config["BATCH_MAX_DIAGRAMS"] = int(os.getenv("BATCH_MAX_DIAGRAMS", 500))
+app.config["JOBS_DIR"] = os.getenv(
+    "JOBS_DIR", os.path.join(tempfile.gettempdir(), "generator-service", "jobs")
+)
+app.config["JOB_WORKERS"] = int(os.getenv("JOB_WORKERS", 2))
+app.config["JOB_MAX_PENDING"] = int(os.getenv("JOB_MAX_PENDING", 8))
+app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")
+app.config["METRICS_DIR"] = os.getenv(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "generator-service", "metrics")
+)
+app.config["JOB_TTL"] = int(os.getenv("JOB_TTL", 24 * 60 * 60))
+app.config["PROFILE_TOKEN"] = os.getenv("PROFILE_TOKEN")
+app.config["PROFILE_SAMPLE_RATE"] = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+app.config["MEMORY_PROFILE"] = os.getenv("MEMORY_PROFILE") == "1"
+app.config["PROFILE_DIR"] = os.getenv(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "generator-service", "profiles")
+)
+
+CORS(
+    app,
+    expose_headers=[
+        "Content-Disposition",
+        "X-Cache",
+        "X-Profile-Id",
+        "X-Memory-Profile",
+        "X-Classes-Regenerated",
+        "X-Classes-Reused",
+    ],
+)
 mysql = MySQL(app, cursorclass=pymysql.cursors.DictCursor)
 mongo = MongoClient(
     username=os.getenv("MONGODB_USERNAME"), password=os.getenv("MONGODB_PASSWORD")
@@ -5,10 +5,11 @@ from database.mappings import (
     class_type_map,
     access_type_map,
     relationship_type_map,
-    boolean_map,
 )
 from generators.document_generator import DocumentGenerator
 from generators.graph_generator import GraphGenerator
+from utilities.metrics import metrics
+from utilities.memory import memory_tracker
 
 
 class Repository:
@@ -16,12 +17,37 @@ class Repository:
     This class is responsible for saving the data to the database.
     """
 
+    def mysql_db(self):
+        """
+        Get the MySQL connection of the request
+        """
+
+        return mysql.get_db()
+
+    def mongo_db(self):
+        """
+        Get the MongoDB database
+        """
+
+        return mongo[os.getenv("MONGODB_DATABASE")]
+
+    def arango_db(self):
+        """
+        Get the ArangoDB database
+        """
+
+        return arango.db(
+            os.getenv("ARANGODB_DATABASE"),
+            os.getenv("ARANGODB_USERNAME"),
+            os.getenv("ARANGODB_PASSWORD"),
+        )
+
     def get_document_meta(self):
         """
         Get the meta for document from the database
         """
 
-        db = mongo[os.getenv("MONGODB_DATABASE")]
+        db = self.mongo_db()
         collection = db["meta"]
         meta = collection.find_one({"_id": "meta-document"})
         return meta
@@ -31,7 +57,7 @@ class Repository:
         Get the meta for document from the database
         """
 
-        db = mongo[os.getenv("MONGODB_DATABASE")]
+        db = self.mongo_db()
         collection = db["meta"]
         meta = collection.find_one({"_id": "meta-graph"})
         return meta
@@ -45,7 +71,7 @@ class Repository:
             return
 
         with open("meta/meta-document.json", "r") as f:
-            db = mongo[os.getenv("MONGODB_DATABASE")]
+            db = self.mongo_db()
             collection = db["meta"]
             meta_document = json.load(f)
             collection.insert_one(meta_document)
@@ -59,70 +85,109 @@ class Repository:
             return
 
         with open("meta/meta-graph.json", "r") as f:
-            db = mongo[os.getenv("MONGODB_DATABASE")]
+            db = self.mongo_db()
             collection = db["meta"]
             meta_graph = json.load(f)
             collection.insert_one(meta_graph)
 
+    @metrics.timed("save_classes")
     def save_classes(self, diagram_id, syntax_tree):
         """
         Save the classes to the database
 
         Parameters:
             diagram_id: the id of the diagram
-            syntax_tree: the syntax tree of the diagram
+            syntax_tree: the SyntaxTree of the diagram
         """
 
-        db = mysql.get_db()
+        db = self.mysql_db()
         cursor = db.cursor()
 
         cursor.execute("DELETE FROM class WHERE diagram_id = %s", (diagram_id,))
+        self._insert_classes(cursor, diagram_id, syntax_tree)
+
+        db.commit()
+
+    @metrics.timed("save_classes_bulk")
+    def save_classes_bulk(self, diagrams):
+        """
+        Save the classes of many diagrams to the database in one transaction
+
+        Parameters:
+            diagrams: list of (diagram_id, syntax_tree) pairs, the last tree of a repeated id is saved
+        """
+
+        diagrams = list(dict(diagrams).items())
+        if not diagrams:
+            return
+
+        db = self.mysql_db()
+        cursor = db.cursor()
+
+        cursor.executemany(
+            "DELETE FROM class WHERE diagram_id = %s",
+            [(diagram_id,) for diagram_id, _ in diagrams],
+        )
+        for diagram_id, syntax_tree in diagrams:
+            self._insert_classes(cursor, diagram_id, syntax_tree)
+
+        db.commit()
+
+    def _insert_classes(self, cursor, diagram_id, syntax_tree):
+        """
+        Insert the classes, their members and relationships of a diagram
+
+        Parameters:
+            cursor: the database cursor
+            diagram_id: the id of the diagram
+            syntax_tree: the SyntaxTree of the diagram
+        """
 
         for class_id, class_data in syntax_tree.items():
             cursor.execute(
                 "INSERT INTO class (id, class_type_id, name_, inner_class, diagram_id) VALUES (%s, %s, %s, %s, %s)",
                 (
                     class_id,
-                    class_type_map[class_data["type"]],
-                    class_data["name"],
-                    boolean_map[class_data["inner"]],
+                    class_type_map[class_data.type],
+                    class_data.name,
+                    int(class_data.inner),
                     diagram_id,
                 ),
             )
 
-            for _, property_data in class_data["properties"].items():
+            for property_data in class_data.properties:
                 cursor.execute(
                     "INSERT INTO property (access_type_id, name_, type_, class_id) VALUES (%s, %s, %s, %s)",
                     (
-                        access_type_map[property_data["access"]],
-                        property_data["name"],
-                        property_data["type"],
+                        access_type_map[property_data.access],
+                        property_data.name,
+                        property_data.type,
                         class_id,
                     ),
                 )
 
-            for _, method_data in class_data["methods"].items():
+            for method_data in class_data.methods:
                 cursor.execute(
                     "INSERT INTO method (access_type_id, abstract, name_, return_type, class_id) VALUES (%s,  %s, %s, %s, %s)",
                     (
-                        access_type_map[method_data["access"]],
-                        boolean_map[method_data["abstract"]],
-                        method_data["name"],
-                        method_data["return_type"],
+                        access_type_map[method_data.access],
+                        int(method_data.abstract),
+                        method_data.name,
+                        method_data.return_type,
                         class_id,
                     ),
                 )
                 method_id = cursor.lastrowid
 
-                for _, parameter_data in method_data["parameters"].items():
+                for parameter_data in method_data.parameters:
                     cursor.execute(
                         "INSERT INTO parameter (name_, type_, method_id) VALUES (%s, %s, %s)",
-                        (parameter_data["name"], parameter_data["type"], method_id),
+                        (parameter_data.name, parameter_data.type, method_id),
                     )
 
         # Create relationships after all classes have been created
         for class_id, class_data in syntax_tree.items():
-            for class_in_relationship in class_data["relationships"]["implements"]:
+            for class_in_relationship in class_data.relationships.implements:
                 cursor.execute(
                     "INSERT INTO relationship (relationship_type_id, parent_class_id, child_class_id) VALUES (%s, %s, %s)",
                     (
@@ -132,13 +197,13 @@ class Repository:
                     ),
                 )
 
-            for class_in_relationship in class_data["relationships"]["extends"]:
+            for class_in_relationship in class_data.relationships.extends:
                 cursor.execute(
                     "INSERT INTO relationship (relationship_type_id, parent_class_id, child_class_id) VALUES (%s, %s, %s)",
                     (relationship_type_map["extends"], class_in_relationship, class_id),
                 )
 
-            for class_in_relationship in class_data["relationships"]["association"]:
+            for class_in_relationship in class_data.relationships.association:
                 cursor.execute(
                     "INSERT INTO relationship (relationship_type_id, parent_class_id, child_class_id) VALUES (%s, %s, %s)",
                     (
@@ -148,9 +213,7 @@ class Repository:
                     ),
                 )
 
-            for class_in_relationship in class_data["relationships"][
-                "aggregationParents"
-            ]:
+            for class_in_relationship in class_data.relationships.aggregation_parents:
                 cursor.execute(
                     "INSERT INTO relationship (relationship_type_id, parent_class_id, child_class_id) VALUES (%s, %s, %s)",
                     (
@@ -160,9 +223,7 @@ class Repository:
                     ),
                 )
 
-            for class_in_relationship in class_data["relationships"][
-                "compositionParents"
-            ]:
+            for class_in_relationship in class_data.relationships.composition_parents:
                 cursor.execute(
                     "INSERT INTO relationship (relationship_type_id, parent_class_id, child_class_id) VALUES (%s, %s, %s)",
                     (
@@ -172,14 +233,13 @@ class Repository:
                     ),
                 )
 
-            for class_in_relationship in class_data["relationships"]["inner"]:
+            for class_in_relationship in class_data.relationships.inner:
                 cursor.execute(
                     "INSERT INTO relationship (relationship_type_id, parent_class_id, child_class_id) VALUES (%s, %s, %s)",
                     (relationship_type_map["inner"], class_id, class_in_relationship),
                 )
 
-        db.commit()
-
+    @metrics.timed("save_document")
     def save_document(self, project, class_type):
         """
         Save the document to the database
@@ -189,44 +249,49 @@ class Repository:
             class_type: the class type
         """
 
-        mysql_db = mysql.get_db()
+        mysql_db = self.mysql_db()
         cursor = mysql_db.cursor()
         cursor.callproc("document_generate_table", (project, class_type))
         cursor.execute("SELECT * FROM document_table")
         rows = cursor.fetchall()
+        metrics.gauge("generator_query_rows", len(rows), query="document")
 
-        mongo_db = mongo[os.getenv("MONGODB_DATABASE")]
+        mongo_db = self.mongo_db()
         collection = mongo_db["documents"]
-        document = DocumentGenerator(self.get_document_meta()).generate(rows)
+        with memory_tracker.track("document_generate"):
+            document = DocumentGenerator(self.get_document_meta()).generate(rows)
         if document:
             collection.insert_one(document)
         return document
 
-    def save_graph(self, project, file_path):
+    @metrics.timed("save_graph")
+    def save_graph(self, project, progress=None):
         """
         Save the graph to the database
 
         Parameters:
             project: the project name
-            file_path: the file path
+            progress: optional callback taking the stage, the done and the total count
 
         Returns:
             graph_name: the name of the graph
+            files: list of [file_name, file_contents] pairs for the graph export
         """
 
-        mysql_db = mysql.get_db()
+        if progress:
+            progress("query")
+
+        mysql_db = self.mysql_db()
         cursor = mysql_db.cursor()
         cursor.callproc("graph_generate_table", (project,))
         cursor.execute("SELECT * FROM graph_table")
         rows = cursor.fetchall()
+        metrics.gauge("generator_query_rows", len(rows), query="graph")
 
-        arango_db = arango.db(
-            os.getenv("ARANGODB_DATABASE"),
-            os.getenv("ARANGODB_USERNAME"),
-            os.getenv("ARANGODB_PASSWORD"),
-        )
+        arango_db = self.arango_db()
 
-        graph_name = GraphGenerator(self.get_graph_meta(), arango_db).generate(
-            rows, file_path
-        )
-        return graph_name
+        with memory_tracker.track("graph_generate"):
+            graph_name, files = GraphGenerator(
+                self.get_graph_meta(), arango_db
+            ).generate(rows, progress)
+        return graph_name, files
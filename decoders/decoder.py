@@ -1,40 +1,322 @@
+import io
+import codecs
 import traceback
 from urllib.parse import unquote
 import zlib
-from bs4 import BeautifulSoup as bs
+from lxml import etree
 import base64
 
+HEX_DIGITS = frozenset("0123456789ABCDEFabcdef")
+
+# limits of the uploaded .drawio file, of the decompressed XML of a page and of the pages
+MAX_INPUT_BYTES = 16 * 1024 * 1024
+MAX_XML_BYTES = 64 * 1024 * 1024
+MAX_PAGES = 100
+
+
+class DiagramTooLargeError(Exception):
+    """
+    The .drawio file, its number of pages or a decompressed page is over the limits
+    """
+
 
 class Decoder:
     """
     Decode and decompress the DrawIO XML
     """
 
+    def __init__(
+        self,
+        max_input_bytes=MAX_INPUT_BYTES,
+        max_xml_bytes=MAX_XML_BYTES,
+        max_pages=MAX_PAGES,
+    ):
+        """
+        Parameters:
+          max_input_bytes: maximum size of the .drawio file content
+          max_xml_bytes: maximum size of the decompressed XML of a page
+          max_pages: maximum number of pages of the .drawio file
+        """
+
+        self.max_input_bytes = max_input_bytes
+        self.max_xml_bytes = max_xml_bytes
+        self.max_pages = max_pages
+
     def convert(self, encoded_xml):
         """
         References:
           https://drawio-app.com/extracting-the-xml-from-mxfiles/
           https://github.com/pzl/drawio-read/blob/master/read.py
 
-        Convert the encoded DrawIO file content to raw XML
+        Convert the encoded DrawIO file content to raw XML, the first page of a
+        file with many pages
 
         Paramters:
           encoded_xml: encoded .drawio file content
 
         Returns:
-          decoded_xml: decode and decompressed xml
+          decoded_xml: decode and decompressed xml, False if unsuccessful
+
+        Raises:
+          DiagramTooLargeError: if the file or the diagram is over the size limits
         """
 
         try:
-            drawio_file_raw = bs(encoded_xml, "lxml")
-            diagram_tag = drawio_file_raw.find("diagram")
-            diagram_tag_text = base64.b64decode(diagram_tag.text)
+            return "".join(self.stream(encoded_xml))
+        except DiagramTooLargeError:
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            print(f"DecodeAndDecompress.convert ERROR: {e}")
+            return False
 
-            decoded_xml = unquote(zlib.decompress(diagram_tag_text, -15).decode("utf8"))
+    def convert_page(self, page):
+        """
+        Convert a page of the DrawIO file to raw XML
+
+        Parameters:
+          page: one of the pages of the file, see pages
 
-            return decoded_xml
+        Returns:
+          decoded_xml: decode and decompressed xml of the page, False if unsuccessful
 
+        Raises:
+          DiagramTooLargeError: if the diagram of the page is over the size limit
+        """
+
+        try:
+            return "".join(self.stream_page(page))
+        except DiagramTooLargeError:
+            raise
         except Exception as e:
             traceback.print_exc()
-            print(f"DecodeAndDecompress.convert ERROR: {e}")
+            print(f"DecodeAndDecompress.convert_page ERROR: {e}")
+            return False
+
+    def pages(self, encoded_xml):
+        """
+        Find the pages of the DrawIO file, without decompressing them
+
+        Parameters:
+          encoded_xml: encoded .drawio file content, text or bytes
+
+        Returns:
+          pages: list of the pages, dictionaries with the id, the name and the data
+            of the page, False if unsuccessful
+
+        Raises:
+          DiagramTooLargeError: if the file is over the size limit or has too many pages
+        """
+
+        try:
+            pages = list()
+            for page in self._pages(encoded_xml):
+                if len(pages) == self.max_pages:
+                    raise DiagramTooLargeError(
+                        f"the file has more than {self.max_pages} pages"
+                    )
+                pages.append(page)
+
+            if not pages:
+                raise ValueError("the file has no diagram")
+            return pages
+        except DiagramTooLargeError:
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            print(f"DecodeAndDecompress.pages ERROR: {e}")
             return False
+
+    def stream(self, encoded_xml, chunk_size=64 * 1024):
+        """
+        Decode the first page of the encoded DrawIO file content to raw XML a chunk at a time
+
+        Parameters:
+          encoded_xml: encoded .drawio file content, text or bytes
+          chunk_size: maximum number of decompressed bytes of a chunk
+
+        Returns:
+          chunks: generator of the decoded and decompressed XML chunks
+
+        Raises:
+          DiagramTooLargeError: if the file or the diagram is over the size limits
+        """
+
+        page = next(self._pages(encoded_xml), None)
+        if page is None:
+            raise ValueError("the file has no diagram")
+
+        yield from self.stream_page(page, chunk_size)
+
+    def stream_page(self, page, chunk_size=64 * 1024):
+        """
+        Decode a page of the DrawIO file to raw XML a chunk at a time
+
+        The diagram is either compressed, the base64 text of the <diagram>, or
+        stored as the <mxGraphModel> element of the <diagram> without compression.
+
+        Parameters:
+          page: one of the pages of the file, see pages
+          chunk_size: maximum number of decompressed bytes of a chunk
+
+        Returns:
+          chunks: generator of the decoded and decompressed XML chunks
+
+        Raises:
+          DiagramTooLargeError: if the diagram is over the size limit
+        """
+
+        data = page["data"]
+        if isinstance(data, str):  # uncompressed
+            yield data
+            return
+
+        decompressor = zlib.decompressobj(-15)
+        decoder = codecs.getincrementaldecoder("utf8")()
+
+        size = 0
+        pending = ""
+        while data:
+            raw = decompressor.decompress(data, chunk_size)
+            data = decompressor.unconsumed_tail
+            size += len(raw)
+            self._check_xml_size(size)
+
+            text = pending + decoder.decode(raw)
+            # an escaped character can be split between the chunks, keep the
+            # escapes at the end for the next chunk
+            split = self._trailing_escapes(text)
+            pending = text[split:]
+            if split:
+                yield unquote(text[:split])
+
+        raw = decompressor.flush()
+        self._check_xml_size(size + len(raw))
+        text = pending + decoder.decode(raw, final=True)
+        if not decompressor.eof:
+            raise zlib.error("incomplete or truncated stream")
+        if text:
+            yield unquote(text)
+
+    def _pages(self, encoded_xml):
+        """
+        Find the pages of the DrawIO file content one at a time, reading the file
+        only up to the end of the page that is needed
+
+        Parameters:
+          encoded_xml: encoded .drawio file content, text or bytes
+
+        Returns:
+          pages: generator of the pages, the data of a page is the base64 decoded
+            compressed diagram, or the XML of an uncompressed diagram
+
+        Raises:
+          DiagramTooLargeError: if the file or an uncompressed diagram is over the size limits
+        """
+
+        if isinstance(encoded_xml, str):
+            encoded_xml = encoded_xml.encode("utf8")
+        if len(encoded_xml) > self.max_input_bytes:
+            raise DiagramTooLargeError(
+                f"the file has {len(encoded_xml)} bytes, the limit is {self.max_input_bytes}"
+            )
+
+        depth = 0
+        for event, element in etree.iterparse(
+            io.BytesIO(encoded_xml),
+            events=("start", "end"),
+            resolve_entities=False,
+            no_network=True,
+            huge_tree=True,
+            recover=True,
+        ):
+            if event == "start":
+                depth += 1
+                if depth == 1 and element.tag == "mxGraphModel":
+                    # a file of the uncompressed diagram alone
+                    yield {
+                        "id": None,
+                        "name": None,
+                        "data": self._serialize(encoded_xml, None),
+                    }
+                    return
+                continue
+
+            depth -= 1
+            if element.tag != "diagram":
+                continue
+
+            model = element.find("mxGraphModel")
+            if model is not None:
+                data = self._serialize(encoded_xml, model)
+            else:
+                data = base64.b64decode("".join(element.itertext()))
+            yield {"id": element.get("id"), "name": element.get("name"), "data": data}
+
+            # the page is read, free it and the pages before it
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    def _serialize(self, encoded_xml, model):
+        """
+        Get the XML of an uncompressed diagram
+
+        Parameters:
+          encoded_xml: the .drawio file content
+          model: the <mxGraphModel> element, None if it is the whole file
+
+        Returns:
+          decoded_xml: the XML of the diagram
+        """
+
+        if model is None:
+            decoded_xml = encoded_xml.decode("utf8")
+        else:
+            decoded_xml = etree.tostring(model, encoding="unicode", with_tail=False)
+        self._check_xml_size(len(decoded_xml))
+
+        return decoded_xml
+
+    def _check_xml_size(self, size):
+        """
+        Fail as soon as the decompressed diagram is over its limit
+
+        Parameters:
+          size: number of bytes of the diagram XML so far
+
+        Raises:
+          DiagramTooLargeError: if the size is over the limit
+        """
+
+        if size > self.max_xml_bytes:
+            raise DiagramTooLargeError(
+                f"the diagram has more than {self.max_xml_bytes} bytes of XML"
+            )
+
+    def _trailing_escapes(self, text):
+        """
+        Find the escapes at the end of the text, complete or not
+
+        Parameters:
+          text: the decompressed text
+
+        Returns:
+          start: index of the first of the escapes, the length of the text if there are none
+        """
+
+        start = len(text)
+        if text[-1:] == "%":
+            start -= 1
+        elif text[-2:-1] == "%" and text[-1] in HEX_DIGITS:
+            start -= 2
+
+        while (
+            start >= 3
+            and text[start - 3] == "%"
+            and text[start - 2] in HEX_DIGITS
+            and text[start - 1] in HEX_DIGITS
+        ):
+            start -= 3
+
+        return start
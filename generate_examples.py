@@ -14,6 +14,6 @@ style_tree = StyleParser().parse(decoded_xml)
 json_to_file("examples/example_style_tree.json", style_tree)
 
 syntax_tree = SyntaxParser().parse(style_tree)
-json_to_file("examples/example_syntax_tree.json", syntax_tree)
+json_to_file("examples/example_syntax_tree.json", syntax_tree.to_dict())
 
 JavaCodeGenerator().generate_code(syntax_tree, "examples/code")
@@ -10,6 +10,10 @@ class CodeGenerator(ABC):
     def generate_code():
         pass
 
+    @abstractmethod
+    def generate_sources():
+        pass
+
     @abstractmethod
     def generate_classes():
         pass
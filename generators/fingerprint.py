@@ -0,0 +1,130 @@
+import json
+from utilities.cache import cache_key
+
+# the relationship lists of which only the names of the classes are generated
+NAMED_RELATIONSHIPS = (
+    "association",
+    "aggregation_children",
+    "aggregation_parents",
+    "composition_children",
+    "composition_parents",
+)
+
+
+def class_fingerprints(syntax_tree, class_ids, version):
+    """
+    Fingerprint the classes by their dependency cone, everything their generated
+    code is made of: the class itself, the names of its associated classes, what
+    it inherits from its parent classes and interfaces, and its inner classes
+
+    Parameters:
+        syntax_tree: the SyntaxTree of the drawio file
+        class_ids: ids of the classes to be fingerprinted
+        version: version of the generator, so a new generator does not reuse the code of the old one
+
+    Returns:
+        fingerprints: dictionary of the hex digests by class id, of the classes and their dependencies
+
+    Raises:
+        ValueError: if the classes depend on each other in a cycle
+    """
+
+    # the inherited members of a class do not depend on the inner classes of its
+    # parents, and an inner class may extend its outer class
+    inheritance = _fingerprint(
+        syntax_tree,
+        list(syntax_tree),
+        lambda relationships: relationships.extends + relationships.implements,
+        lambda _id, parents: cache_key(
+            "inheritance", version, _content(syntax_tree, _id), *parents
+        ),
+    )
+
+    return _fingerprint(
+        syntax_tree,
+        class_ids,
+        lambda relationships: relationships.inner,
+        lambda _id, inner: cache_key("class", inheritance[_id], *inner),
+    )
+
+
+def _fingerprint(syntax_tree, class_ids, dependencies, digest):
+    """
+    Fingerprint the classes after their dependencies, depth first without recursion
+
+    Parameters:
+        syntax_tree: the SyntaxTree of the drawio file
+        class_ids: ids of the classes to be fingerprinted
+        dependencies: function of the Relationships of a class to the ids it depends on
+        digest: function of a class id and the fingerprints of its dependencies to its fingerprint
+
+    Returns:
+        fingerprints: dictionary of the hex digests by class id, of the classes and their dependencies
+
+    Raises:
+        ValueError: if the classes depend on each other in a cycle
+    """
+
+    fingerprints = dict()
+    for start in class_ids:
+        stack = [start]
+        visiting = set()
+        while stack:
+            _id = stack[-1]
+            if _id in fingerprints:
+                stack.pop()
+                continue
+
+            depends_on = dependencies(syntax_tree[_id].relationships)
+            pending = [d for d in depends_on if d not in fingerprints]
+            if not pending:
+                fingerprints[_id] = digest(_id, [fingerprints[d] for d in depends_on])
+                visiting.discard(_id)
+                stack.pop()
+                continue
+
+            if _id in visiting:
+                raise ValueError(f"the class {syntax_tree[_id].name} depends on itself")
+            visiting.add(_id)
+            stack += pending
+
+    return fingerprints
+
+
+def _content(syntax_tree, _id):
+    """
+    Serialize the parts of a class that are generated, without the member ids
+
+    Parameters:
+        syntax_tree: the SyntaxTree of the drawio file
+        _id: id of the class
+
+    Returns:
+        content: JSON text of the class
+    """
+
+    _class = syntax_tree[_id]
+    relationships = _class.relationships
+    return json.dumps(
+        [
+            _class.name,
+            _class.type,
+            [[p.access, p.name, p.type] for p in _class.properties],
+            [
+                [
+                    m.access,
+                    m.abstract,
+                    m.name,
+                    [[p.name, p.type] for p in m.parameters],
+                    m.return_type,
+                ]
+                for m in _class.methods
+            ],
+            [
+                [syntax_tree[target].name for target in getattr(relationships, key)]
+                for key in NAMED_RELATIONSHIPS
+            ],
+            # the number of parent classes separates them from the interfaces
+            len(relationships.extends),
+        ]
+    )
@@ -1,4 +1,3 @@
-import os
 import json
 from uuid import uuid4
 from copy import deepcopy
@@ -15,20 +14,21 @@ class GraphGenerator(DataGenerator):
         del self.meta["_id"]
         self.arango_db = arango_db
 
-    def generate(self, rows, file_path):
+    def generate(self, rows, progress=None):
         """
         Generate the graph from the meta description and the rows.
 
         Parameters:
             rows: the rows from the database
-            file_path: path for the graph files to be written to
+            progress: optional callback taking the stage, the done and the total count
 
         Returns:
             graph_name: the name of the graph
+            files: list of [file_name, file_contents] pairs for the graph export
         """
 
         if rows == None or len(rows) == 0:
-            return None
+            return None, None
 
         graph_name = rows[0][self.meta["graph_name"]]
         _id = uuid4()
@@ -58,7 +58,10 @@ class GraphGenerator(DataGenerator):
                 ),
             )
 
-        for row in rows:
+        for i, row in enumerate(rows):
+            if progress:
+                progress("graph", i, len(rows))
+
             for vertex_name, vertex_collection in vertex_collections.items():
                 data_list = self.meta["vertex_collections"][vertex_name]["data"]
                 for data in data_list:
@@ -84,6 +87,9 @@ class GraphGenerator(DataGenerator):
                             )
                         )
 
+        if progress:
+            progress("export")
+
         documents = {}
         for collection in {**vertex_collections, **edge_definitions}.values():
             cursor = collection.all()
@@ -92,9 +98,9 @@ class GraphGenerator(DataGenerator):
                 sub_documents.append(result)
             documents[collection.name] = sub_documents
 
-        self.generate_files(file_path, documents)
+        files = self.generate_files(documents)
 
-        return graph.name
+        return graph.name, files
 
     def fill_meta_description(self, template, row, columns):
         """
@@ -134,16 +140,18 @@ class GraphGenerator(DataGenerator):
 
         return meta_value
 
-    def generate_files(self, file_path, documents):
+    def generate_files(self, documents):
         """
-        Write generated document to the file system.
+        Serialize the generated documents to JSON files.
 
         Parameters:
-            file_path: path for the graph files to be written to
             documents: the generated documents
+
+        Returns:
+            files: list of [file_name, file_contents] pairs
         """
 
-        os.makedirs(file_path, exist_ok=True)
-        for document_name, document_value in documents.items():
-            with open(f"{file_path}/{document_name}.json", "w") as file:
-                file.write(json.dumps(document_value, indent=4, default=str))
+        return [
+            [f"{document_name}.json", json.dumps(document_value, indent=4, default=str)]
+            for document_name, document_value in documents.items()
+        ]
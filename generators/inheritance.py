@@ -0,0 +1,283 @@
+class InheritanceCycleError(Exception):
+    """
+    Classes of the diagram extend or implement each other in a cycle
+    """
+
+    def __init__(self, cycles):
+        """
+        Parameters:
+            cycles: lists of the names of the classes of every cycle
+        """
+
+        super().__init__("; ".join(", ".join(names) for names in cycles))
+        self.cycles = cycles
+
+    def __reduce__(self):
+        # rebuilt from the cycles when it is raised in a pool process
+        return type(self), (self.cycles,)
+
+
+def inheritance_cycles(syntax_tree):
+    """
+    Find the cycles of the extends and implements relationships, the strongly
+    connected components of their graph, with Tarjan's algorithm on an explicit stack
+
+    Parameters:
+        syntax_tree: the SyntaxTree of the drawio file
+
+    Returns:
+        cycles: lists of the ids of the classes of every cycle, in the order of the relationships
+    """
+
+    def parents(_id):
+        relationships = syntax_tree[_id].relationships
+        return relationships.extends + relationships.implements
+
+    index = dict()
+    lowlink = dict()
+    component = list()
+    on_component = set()
+    cycles = list()
+
+    for start in syntax_tree:
+        if start in index:
+            continue
+
+        index[start] = lowlink[start] = len(index)
+        component.append(start)
+        on_component.add(start)
+        work = [(start, iter(parents(start)))]
+        while work:
+            _id, edges = work[-1]
+            for parent in edges:
+                if parent not in index:
+                    index[parent] = lowlink[parent] = len(index)
+                    component.append(parent)
+                    on_component.add(parent)
+                    work.append((parent, iter(parents(parent))))
+                    break
+                if parent in on_component:
+                    lowlink[_id] = min(lowlink[_id], index[parent])
+            else:
+                work.pop()
+                if work:
+                    caller = work[-1][0]
+                    lowlink[caller] = min(lowlink[caller], lowlink[_id])
+                if lowlink[_id] != index[_id]:
+                    continue
+
+                # _id is the root of a component, the classes down to it on the stack
+                members = list()
+                while not members or members[-1] != _id:
+                    members.append(component.pop())
+                    on_component.discard(members[-1])
+                members.reverse()
+                if len(members) > 1 or _id in parents(_id):
+                    cycles.append(members)
+
+    return cycles
+
+
+def validate_inheritance(syntax_tree):
+    """
+    Check that no classes inherit from each other in a cycle
+
+    Parameters:
+        syntax_tree: the SyntaxTree of the drawio file
+
+    Raises:
+        InheritanceCycleError: with the names of the classes of every cycle
+    """
+
+    cycles = inheritance_cycles(syntax_tree)
+    if cycles:
+        raise InheritanceCycleError(
+            [[syntax_tree[_id].name for _id in members] for members in cycles]
+        )
+
+
+class InheritanceAnalysis:
+    """
+    Inherited properties and abstract methods of the classes of a syntax tree
+
+    Every class is resolved once, after the classes it extends or implements,
+    and its results are cached, so the members of a shared ancestor are not
+    collected again for each of its descendants.
+    """
+
+    def __init__(self, syntax_tree):
+        """
+        Parameters:
+            syntax_tree: the SyntaxTree of the drawio file
+        """
+
+        self.syntax_tree = syntax_tree
+        # keyed by (kind, class id), see _dependencies for the kinds
+        self.resolved = dict()
+
+    def parent_properties(self, extends):
+        """
+        Get the properties inherited from the extended classes, the properties of
+        the most distant ancestors first
+
+        Parameters:
+            extends: list of the ids of the extended classes
+
+        Returns:
+            parent_properties: list of the inherited Property objects
+        """
+
+        parent_properties = list()
+        for e in reversed(extends):
+            parent_properties += self._resolve(("properties", e))
+
+        return parent_properties
+
+    def abstract_methods(self, implements, extends):
+        """
+        Get the abstract methods that require implementation, without duplicates
+
+        Parameters:
+            implements: list of the ids of the implemented interfaces
+            extends: list of the ids of the extended classes
+
+        Returns:
+            abstract_methods: list of the Method objects in the order they are generated
+        """
+
+        return self._unique(
+            [self._resolve(("extended", e)) for e in reversed(extends)]
+            + [self._resolve(("implemented", i)) for i in reversed(implements)]
+        )
+
+    def resolve_all(self):
+        """
+        Resolve the results of every class of the tree, so they can be shared
+        read-only with the processes that generate the classes
+        """
+
+        for _id in self.syntax_tree:
+            for kind in ("properties", "implemented", "extended"):
+                self._resolve((kind, _id))
+
+    def _dependencies(self, node):
+        """
+        Get the results that a result is built from
+
+        The "properties" of a class are its own properties after the inherited
+        ones. The "implemented" and "extended" methods are the abstract methods
+        that a class passes on as an interface or as a superclass, the extended
+        classes of an interface are also taken as its interfaces.
+
+        Parameters:
+            node: (kind, class id) of the result
+
+        Returns:
+            dependencies: list of the nodes of the results
+        """
+
+        kind, _id = node
+        relationships = self.syntax_tree[_id].relationships
+        if kind == "properties":
+            return [("properties", e) for e in relationships.extends]
+
+        implements = (
+            relationships.extends if kind == "implemented" else relationships.implements
+        )
+        return [("implemented", i) for i in implements] + [
+            ("extended", e) for e in relationships.extends
+        ]
+
+    def _build(self, node):
+        """
+        Build a result from the resolved results of its dependencies
+
+        Parameters:
+            node: (kind, class id) of the result
+
+        Returns:
+            result: list of the Property or Method objects
+        """
+
+        kind, _id = node
+        _class = self.syntax_tree[_id]
+        if kind == "properties":
+            return self.parent_properties(_class.relationships.extends) + list(
+                _class.properties
+            )
+
+        if kind == "implemented":
+            methods = list(_class.methods)
+            implements = _class.relationships.extends
+        else:
+            methods = [m for m in _class.methods if m.abstract]
+            implements = _class.relationships.implements
+
+        return self._unique(
+            [self.abstract_methods(implements, _class.relationships.extends), methods]
+        )
+
+    def _resolve(self, node):
+        """
+        Resolve a result and the results it depends on, depth first without recursion
+
+        Parameters:
+            node: (kind, class id) of the result
+
+        Returns:
+            result: the cached result
+
+        Raises:
+            InheritanceCycleError: if the classes inherit from each other in a cycle
+        """
+
+        stack = [node]
+        visiting = set()
+        while stack:
+            current = stack[-1]
+            if current in self.resolved:
+                stack.pop()
+                continue
+
+            pending = [d for d in self._dependencies(current) if d not in self.resolved]
+            if not pending:
+                self.resolved[current] = self._build(current)
+                visiting.discard(current)
+                stack.pop()
+                continue
+
+            if current in visiting:
+                # the classes of the results depend on each other
+                validate_inheritance(self.syntax_tree)
+            visiting.add(current)
+            stack += pending
+
+        return self.resolved[node]
+
+    def _unique(self, method_lists):
+        """
+        Join lists of methods, keeping the first of the equal methods
+
+        Parameters:
+            method_lists: lists of the Method objects
+
+        Returns:
+            methods: list of the distinct methods
+        """
+
+        seen = set()
+        unique = list()
+        for methods in method_lists:
+            for method in methods:
+                key = (
+                    method.access,
+                    method.abstract,
+                    method.name,
+                    tuple((p.name, p.type) for p in method.parameters),
+                    method.return_type,
+                )
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(method)
+
+        return unique
@@ -1,7 +1,15 @@
 import traceback
 import re
 import os
+import threading
+import multiprocessing
 from generators.code_generator import CodeGenerator
+from generators.fingerprint import class_fingerprints
+from generators.inheritance import InheritanceAnalysis
+from generators.source_writer import SourceWriter
+
+# the generator and the syntax tree of a process that generates classes in parallel
+_shared = None
 
 
 class JavaCodeGenerator(CodeGenerator):
@@ -9,6 +17,26 @@ class JavaCodeGenerator(CodeGenerator):
     Generate Java code
     """
 
+    # version of the generated code, change it when the output changes so the
+    # cached classes are not reused
+    version = "1"
+
+    def __init__(self, workers=0, min_classes=1000, cache=None):
+        """
+        Parameters:
+            workers: number of processes that generate the classes of a large diagram,
+              0 or 1 to generate them in this process, as do the processes with other threads
+            min_classes: number of the top-level classes of a diagram to generate it in parallel
+            cache: optional ResultCache of the class sources, by the fingerprint of the class
+        """
+
+        self.workers = workers
+        self.min_classes = min_classes
+        self.cache = cache
+        self.inheritance = None
+        # numbers of the top-level classes of the last generation
+        self.classes = {"regenerated": 0, "reused": 0}
+
     def generate_code(self, syntax_tree, file_path):
         """
         Use the syntax tree to generate code files for the UML class diagrams
@@ -18,171 +46,251 @@ class JavaCodeGenerator(CodeGenerator):
             file_path: path for the code files to be written to
         """
 
-        print("<<< GENERATING CODE FILES FROM SYNTAX TREE >>>")
+        files = self.generate_sources(syntax_tree)
+        if files is False:
+            return False
+
+        self.generate_files(file_path.strip("/"), files)
+        return True
 
-        files = []
+    def generate_sources(self, syntax_tree):
+        """
+        Use the syntax tree to generate the source code for the UML class diagrams
+
+        Parameters:
+            syntax_tree: syntax_tree of the drawio file
+
+        Returns:
+            files: list of [file_name, file_contents] pairs, False if unsuccessful
+        """
+
+        print("<<< GENERATING CODE FILES FROM SYNTAX TREE >>>")
 
         try:
             # get all classes that are not inner classes
-            non_inner = [
-                (_id, _class)
-                for _id, _class in syntax_tree.items()
-                if _class["inner"] == "false"
+            class_ids = [_id for _id, _class in syntax_tree.items() if not _class.inner]
+
+            # reuse the classes whose dependencies have not changed
+            sources = dict()
+            if self.cache is not None:
+                fingerprints = class_fingerprints(syntax_tree, class_ids, self.version)
+                for _id in class_ids:
+                    source = self.cache.get(fingerprints[_id])
+                    if source is not None:
+                        sources[_id] = source
+
+            missing = [_id for _id in class_ids if _id not in sources]
+            # fork only from a single-threaded process, a lock held by another
+            # thread at the fork, like those of the Metrics, the caches or the job
+            # and request threads, would stay locked in the children. A daemonic
+            # process, like a pool worker, cannot fork its own processes.
+            if (
+                self.workers > 1
+                and len(missing) >= self.min_classes
+                and threading.active_count() == 1
+                and not multiprocessing.current_process().daemon
+            ):
+                generated = self.generate_parallel(syntax_tree, missing)
+            else:
+                generated = [self.generate_source(syntax_tree, _id) for _id in missing]
+
+            for _id, source in zip(missing, generated):
+                sources[_id] = source
+                if self.cache is not None:
+                    self.cache.put(fingerprints[_id], source)
+
+            self.classes = {
+                "regenerated": len(missing),
+                "reused": len(class_ids) - len(missing),
+            }
+            return [
+                [syntax_tree[_id].name + ".java", sources[_id]] for _id in class_ids
             ]
 
-            for _, _class in non_inner:
-                file = self.generate_classes(_class, syntax_tree)
-                files.append([_class["name"], file])
-
-            self.generate_files(file_path.strip("/"), files)
-            return True
-
         except Exception as e:
             traceback.print_exc()
-            print(f"JavaCodeGenerator.generate_code ERROR: {e}")
+            print(f"JavaCodeGenerator.generate_sources ERROR: {e}")
             return False
 
-    def generate_classes(self, _class, syntax_tree, indent=1):
+    def generate_parallel(self, syntax_tree, class_ids):
         """
-        Generate the class header
+        Generate the classes in chunks on forked processes, which share the syntax
+        tree and the resolved inheritance of this process without copying them
 
         Parameters:
-            _class: dictionary of class to be generated
-            syntax_tree: syntax tree dictionary
-            indent: indentation level
+            syntax_tree: syntax_tree of the drawio file
+            class_ids: ids of the top-level classes, in the order of the files
 
         Returns:
-            class_string: class string
+            sources: list of the source code of the classes, in their order
         """
 
-        class_string = ""
-        tabs = "\t" * (indent - 1)
+        self.get_inheritance(syntax_tree).resolve_all()
+
+        # a few chunks per process, so a chunk of large classes does not hold up the rest
+        chunk_size = -(-len(class_ids) // (self.workers * 4))
+        chunks = [
+            class_ids[i : i + chunk_size] for i in range(0, len(class_ids), chunk_size)
+        ]
+
+        # a pool per diagram, a reused or forkserver pool would have to pickle the
+        # tree and the inheritance to its processes, which takes longer than
+        # generating them
+        context = multiprocessing.get_context("fork")
+        with context.Pool(
+            self.workers, initializer=_share, initargs=(self, syntax_tree)
+        ) as pool:
+            generated = pool.map(_generate_chunk, chunks)
+
+        return [source for chunk_sources in generated for source in chunk_sources]
+
+    def generate_source(self, syntax_tree, _id):
+        """
+        Generate the file of a top-level class
+
+        Parameters:
+            syntax_tree: syntax_tree of the drawio file
+            _id: id of the class
+
+        Returns:
+            source: the source code of the class with its inner classes
+        """
+
+        writer = SourceWriter()
+        self.generate_classes(writer, syntax_tree[_id], syntax_tree)
+        return writer.getvalue()
+
+    def generate_classes(self, writer, _class, syntax_tree):
+        """
+        Generate the class with its inner classes
+
+        Parameters:
+            writer: the SourceWriter of the file, at the indentation of the class
+            _class: the Class to be generated
+            syntax_tree: the SyntaxTree of the drawio file
+        """
+
+        tabs = writer.tabs
 
         inheritance = ""
-        if len(_class["relationships"]["extends"]) > 0:
+        if len(_class.relationships.extends) > 0:
             inheritance += "extends "
             inheritance += ",".join(
-                [syntax_tree[r]["name"] for r in _class["relationships"]["extends"]]
+                [syntax_tree[r].name for r in _class.relationships.extends]
             ).strip(",")
 
         implementation = ""
-        if len(_class["relationships"]["implements"]) > 0:
+        if len(_class.relationships.implements) > 0:
             implementation += "implements "
             implementation += ",".join(
-                [syntax_tree[r]["name"] for r in _class["relationships"]["implements"]]
+                [syntax_tree[r].name for r in _class.relationships.implements]
             ).strip(",")
 
-        abstract_methods = list()
-        self.get_abstract_methods(
+        abstract_methods = self.get_abstract_methods(
             syntax_tree,
-            _class["relationships"]["implements"],
-            _class["relationships"]["extends"],
-            abstract_methods,
+            _class.relationships.implements,
+            _class.relationships.extends,
         )
-        abstract_methods.reverse()  # reverse the list so that the abstract methods are in the correct order
-        abstract_methods = [
-            m for i, m in enumerate(abstract_methods) if m not in abstract_methods[:i]
-        ]  # remove duplicate abstract methods
 
-        associations = self.get_associations(syntax_tree, _class["relationships"])
+        associations = self.get_associations(syntax_tree, _class.relationships)
         aggregation_children = self.get_aggregation_children(
-            syntax_tree, _class["relationships"]
+            syntax_tree, _class.relationships
         )
         aggregation_parents = self.get_aggregation_parents(
-            syntax_tree, _class["relationships"]
+            syntax_tree, _class.relationships
         )
         composition_children = self.get_composition_children(
-            syntax_tree, _class["relationships"]
+            syntax_tree, _class.relationships
         )
         composition_parents = self.get_composition_parents(
-            syntax_tree, _class["relationships"]
+            syntax_tree, _class.relationships
         )
-        # join all associations
-        all_associations = (
-            associations
+        # join all associations, with the name of their property
+        all_associations = [
+            (association, association[0].lower() + association[1:])
+            for association in associations
             + aggregation_children
             + aggregation_parents
             + composition_children
             + composition_parents
-        )
+        ]
 
-        type_of_class = "public class" if _class["type"] == "class" else _class["type"]
+        type_of_class = "public class" if _class.type == "class" else _class.type
         type_of_class = (
-            _class["type"] + " class" if _class["type"] == "abstract" else type_of_class
+            _class.type + " class" if _class.type == "abstract" else type_of_class
         )
 
-        class_string = (
-            f"{tabs}{type_of_class} {_class['name']} {inheritance} {implementation}"
-            + " {\n"
+        header = " ".join(
+            part
+            for part in (type_of_class, _class.name, inheritance, implementation)
+            if part
         )
-        class_string = re.sub(" +", " ", class_string)
+        header = f"{tabs}{header} {{\n"
+        if "  " in header:  # names with many spaces
+            header = re.sub(" +", " ", header)
+        writer.write(header, "\n")
+
+        with writer.indented():
+            self.generate_properties(writer, _class.properties, all_associations)
+            if (
+                _class.properties
+                or _class.relationships.association
+                or _class.relationships.aggregation_children
+                or _class.relationships.aggregation_parents
+                or _class.relationships.composition_children
+                or _class.relationships.composition_parents
+            ):
+                writer.write("\n")
+
+            if "class" in type_of_class:
+                self.generate_constructors(
+                    writer,
+                    syntax_tree,
+                    _class.name,
+                    _class.properties,
+                    all_associations,
+                    _class.relationships.extends,
+                )
 
-        class_string += "\n"
-        class_string += self.generate_properties(
-            _class["properties"], all_associations, indent
-        )
-        if (
-            _class["properties"]
-            or _class["relationships"]["association"]
-            or _class["relationships"]["aggregationChildren"]
-            or _class["relationships"]["aggregationParents"]
-            or _class["relationships"]["compositionChildren"]
-            or _class["relationships"]["compositionParents"]
-        ):
-            class_string += "\n"
-
-        if "class" in type_of_class:
-            class_string += self.generate_constructors(
-                syntax_tree,
-                _class["name"],
-                _class["properties"],
+            self.generate_methods(
+                writer,
+                _class.methods,
+                _class.properties,
                 all_associations,
-                _class["relationships"]["extends"],
-                indent,
+                _class.type,
+                abstract_methods,
             )
 
-        class_string += self.generate_methods(
-            _class["methods"],
-            _class["properties"],
-            all_associations,
-            _class["type"],
-            abstract_methods,
-            indent,
-        )
-
-        for inner_class_id in _class["relationships"]["inner"]:
-            inner_class = syntax_tree[inner_class_id]
-            class_string += self.generate_classes(inner_class, syntax_tree, indent + 1)
-            class_string += "\n"
+            for inner_class_id in _class.relationships.inner:
+                inner_class = syntax_tree[inner_class_id]
+                self.generate_classes(writer, inner_class, syntax_tree)
+                writer.write("\n")
 
-        class_string += f"{tabs}}}\n"
+        writer.write(tabs, "}\n")
 
-        return class_string
-
-    def generate_properties(self, properties, all_asssociations, indent):
+    def generate_properties(self, writer, properties, all_associations):
         """
         Generate properties for the class
 
         Parameters:
-            properties: dictionary of properties
-            all_asssociations: list of associations, aggreatation children, aggregation parents, composition children, composition parents
-            indent: indentation level
-
-        Returns:
-            properties_string: string of the properties
+            writer: the SourceWriter of the file, at the indentation of the members
+            properties: list of properties
+            all_associations: list of (type, name) of the associations, aggreatation children, aggregation parents, composition children, composition parents
         """
 
-        properties_string = ""
-        tabs = "\t" * indent
-        for _, _property_value in properties.items():
-            p = f"{tabs}{_property_value['access']} {_property_value['type']} {_property_value['name']};\n"
-            properties_string += p
-
-        for association in all_asssociations:
-            p = f"{tabs}private {association} {association[0].lower() + association[1:]};\n"
-            properties_string += p
-
-        return properties_string
+        tabs = writer.tabs
+        writer.writelines(
+            [
+                f"{tabs}{_property_value.access} {_property_value.type} {_property_value.name};\n"
+                for _property_value in properties
+            ]
+        )
+        writer.writelines(
+            [
+                f"{tabs}private {association} {name};\n"
+                for association, name in all_associations
+            ]
+        )
 
     def get_associations(self, syntax_tree, relationships):
         """
@@ -190,15 +298,15 @@ class JavaCodeGenerator(CodeGenerator):
 
         Parameters:
             syntax_tree: syntax_tree of the drawio file
-            relationships: dictionary of relationships
+            relationships: Relationships of the class
 
         Returns:
             associations: list of associations
         """
 
         associations = list()
-        for association in relationships["association"]:
-            associations.append(syntax_tree[association]["name"])
+        for association in relationships.association:
+            associations.append(syntax_tree[association].name)
 
         return associations
 
@@ -208,15 +316,15 @@ class JavaCodeGenerator(CodeGenerator):
 
         Parameters:
             syntax_tree: syntax_tree of the drawio file
-            relationships: dictionary of relationships
+            relationships: Relationships of the class
 
         Returns:
             aggregation_children: list of aggregation children
         """
 
         aggregation_children = list()
-        for aggregation in relationships["aggregationChildren"]:
-            aggregation_children.append(syntax_tree[aggregation]["name"])
+        for aggregation in relationships.aggregation_children:
+            aggregation_children.append(syntax_tree[aggregation].name)
 
         return aggregation_children
 
@@ -226,15 +334,15 @@ class JavaCodeGenerator(CodeGenerator):
 
         Parameters:
             syntax_tree: syntax_tree of the drawio file
-            relationships: dictionary of relationships
+            relationships: Relationships of the class
 
         Returns:
             aggregation_parents: list of aggregation parents
         """
 
         aggregation_parents = list()
-        for aggregation in relationships["aggregationParents"]:
-            aggregation_parents.append(syntax_tree[aggregation]["name"])
+        for aggregation in relationships.aggregation_parents:
+            aggregation_parents.append(syntax_tree[aggregation].name)
 
         return aggregation_parents
 
@@ -244,15 +352,15 @@ class JavaCodeGenerator(CodeGenerator):
 
         Parameters:
             syntax_tree: syntax_tree of the drawio file
-            relationships: dictionary of relationships
+            relationships: Relationships of the class
 
         Returns:
             composition_children: list of composition children
         """
 
         composition_children = list()
-        for composition in relationships["compositionChildren"]:
-            composition_children.append(syntax_tree[composition]["name"])
+        for composition in relationships.composition_children:
+            composition_children.append(syntax_tree[composition].name)
 
         return composition_children
 
@@ -262,190 +370,159 @@ class JavaCodeGenerator(CodeGenerator):
 
         Parameters:
             syntax_tree: syntax_tree of the drawio file
-            relationships: dictionary of relationships
+            relationships: Relationships of the class
 
         Returns:
             composition_parents: list of composition parents
         """
 
         composition_parents = list()
-        for composition in relationships["compositionParents"]:
-            composition_parents.append(syntax_tree[composition]["name"])
+        for composition in relationships.composition_parents:
+            composition_parents.append(syntax_tree[composition].name)
 
         return composition_parents
 
-    def get_parent_properties(self, syntax_tree, extends, parent_properties):
+    def get_inheritance(self, syntax_tree):
         """
-        Get the properties of the parent class
+        Get the inheritance analysis of the syntax tree, shared by all its classes
 
         Parameters:
             syntax_tree: syntax_tree of the drawio file
-            extends: list of classes that the class extends
-            parent_properties: list of parent properties
 
         Returns:
-            parent_properties: list of parent properties
+            inheritance: the InheritanceAnalysis of the syntax tree
         """
 
-        for e in extends:
-            properties = list(syntax_tree[e]["properties"].values())
-            if properties:
-                parent_properties.insert(0, *properties)
+        if self.inheritance is None or self.inheritance.syntax_tree is not syntax_tree:
+            self.inheritance = InheritanceAnalysis(syntax_tree)
 
-            self.get_parent_properties(
-                syntax_tree,
-                syntax_tree[e]["relationships"]["extends"],
-                parent_properties,
-            )
+        return self.inheritance
+
+    def get_parent_properties(self, syntax_tree, extends):
+        """
+        Get the properties of the parent classes
+
+        Parameters:
+            syntax_tree: syntax_tree of the drawio file
+            extends: list of classes that the class extends
 
-        return parent_properties
+        Returns:
+            parent_properties: list of parent properties
+        """
+
+        return self.get_inheritance(syntax_tree).parent_properties(extends)
 
     def generate_constructors(
-        self, syntax_tree, class_name, properties, all_associations, extends, indent
+        self, writer, syntax_tree, class_name, properties, all_associations, extends
     ):
         """
         Generate constructors for the class
 
         Parameters:
+            writer: the SourceWriter of the file, at the indentation of the members
             syntax_tree: syntax_tree of the drawio file
             class_name: name of the class
-            properties: dictionary of properties
-            all_asssociations: list of associations, aggreatation children, aggregation parents, composition children, composition parents
+            properties: list of properties
+            all_associations: list of (type, name) of the associations, aggreatation children, aggregation parents, composition children, composition parents
             extends: list of classes that the class extends
-            indent: indentation level
-
-        Returns:
-            constructors_string: string of the constructors
         """
 
-        parent_params = self.get_parent_properties(syntax_tree, extends, list())
-
-        if not properties and not all_associations and not parent_params:
-            return ""
+        parent_properties = self.get_parent_properties(syntax_tree, extends)
 
-        tabs = "\t" * indent
-        constructors_string = f"{tabs}public {class_name}() {{}}\n\n"
+        if not properties and not all_associations and not parent_properties:
+            return
 
-        child_params = [
-            {"type": p["type"], "name": p["name"]} for p in properties.values()
-        ] + [{"type": a, "name": a[0].lower() + a[1:]} for a in all_associations]
+        tabs = writer.tabs
+        writer.write(f"{tabs}public {class_name}() {{}}\n\n")
 
-        parent_params = self.get_parent_properties(syntax_tree, extends, list())
-
-        all_params = parent_params + child_params
+        child_params = [(p.type, p.name) for p in properties] + all_associations
+        parent_params = [(p.type, p.name) for p in parent_properties]
 
         constructor_signature = ", ".join(
-            [f"{p['type']} {p['name']}" for p in all_params]
+            [f"{_type} {name}" for _type, name in parent_params + child_params]
         )
+        writer.write(f"{tabs}public {class_name}({constructor_signature}) {{\n")
 
-        constructor_body = ""
         if extends:
-            super_args = ", ".join([p["name"] for p in parent_params])
-            constructor_body = f"\t{tabs}super({super_args});\n"
+            super_args = ", ".join([name for _, name in parent_params])
+            writer.write(f"\t{tabs}super({super_args});\n")
 
-        constructor_body += "".join(
-            [f"\t{tabs}this.{p['name']} = {p['name']}\n" for p in child_params]
+        writer.writelines(
+            [f"\t{tabs}this.{name} = {name}\n" for _, name in child_params]
         )
 
-        constructors_string += f"{tabs}public {class_name}({constructor_signature}) {{\n{constructor_body}\t}}\n\n"
-
-        return constructors_string
+        writer.write("\t}\n\n")
 
     def generate_methods(
         self,
+        writer,
         methods,
         properties,
-        all_asssociations,
+        all_associations,
         class_type,
         abstract_methods,
-        indent,
     ):
         """
         Generate methods for the class
 
         Parameters:
-            methods: dictionary of methods
-            properties: dictionary of properties
-            all_asssociations: list of associations, aggreatation children, aggregation parents, composition children, composition parents
+            writer: the SourceWriter of the file, at the indentation of the members
+            methods: list of methods
+            properties: list of properties
+            all_associations: list of (type, name) of the associations, aggreatation children, aggregation parents, composition children, composition parents
             class_type: type of current class
             abstract_methods: list of abstract methods
-            indent: indentation level
-
-        Returns:
-            methods_string: string of the methods
         """
 
+        tabs = writer.tabs
         # getter and setter methods
-        methods_string = ""
-        tabs = "\t" * indent
         if class_type == "class" or class_type == "abstract":
             # normal properties
-            for _, _property_value in properties.items():
-                if _property_value["access"] == "private":
-                    getter = (
-                        f"{tabs}public {_property_value['type']} get{_property_value['name'][0].upper() + _property_value['name'][1:]}()"
-                        f" {{\n {tabs}\treturn this.{_property_value['name']}; \n{tabs}}}\n"
-                    )
-                    methods_string += getter + "\n"
-
-                    setter = (
-                        f"{tabs}public void set{_property_value['name'][0].upper() + _property_value['name'][1:]}({_property_value['type']} {_property_value['name']})"
-                        f" {{\n {tabs}\tthis.{_property_value['name']} = {_property_value['name']}; \n{tabs}}}\n"
-                    )
-                    methods_string += setter + "\n"
-
+            accessors = [
+                (p.type, p.name, p.name[0].upper() + p.name[1:])
+                for p in properties
+                if p.access == "private"
+            ]
             # all association properties
-            for association in all_asssociations:
-                getter = (
-                    f"{tabs}public {association} get{association[0].upper() + association[1:]}()"
-                    f" {{\n {tabs}\treturn this.{association[0].lower() + association[1:]}; \n{tabs}}}\n"
-                )
-                methods_string += getter + "\n"
+            accessors += [
+                (association, name, association[0].upper() + association[1:])
+                for association, name in all_associations
+            ]
 
-                setter = (
-                    f"{tabs}public void set{association[0].upper() + association[1:]}({association} {association[0].lower() + association[1:]})"
-                    f" {{\n {tabs}\tthis.{association[0].lower() + association[1:]} = {association[0].lower() + association[1:]}; \n{tabs}}}\n"
-                )
-                methods_string += setter + "\n"
+            writer.writelines(
+                [
+                    f"{tabs}public {_type} get{capitalized}() {{\n {tabs}\treturn this.{name}; \n{tabs}}}\n\n"
+                    f"{tabs}public void set{capitalized}({_type} {name}) {{\n {tabs}\tthis.{name} = {name}; \n{tabs}}}\n\n"
+                    for _type, name, capitalized in accessors
+                ]
+            )
 
         # abstract methods
         if class_type == "class":
-            for abstract_method in abstract_methods:
-                comment = "// TODO: Must be implemented!"
-                m = (
-                    f"{tabs}{abstract_method['access']} {abstract_method['return_type']} {abstract_method['name']}()"
-                    f" {{\n {tabs}\t{comment} \n{tabs}}}\n"
-                )
-                methods_string += m + "\n"
-
-        # normal methods
-        for _, method_value in methods.items():
-            if not method_value["parameters"]:
-                params = "()"
-            else:
-                params = (
-                    "("
-                    + ", ".join(
-                        [
-                            f"{p['type']} {p['name']}"
-                            for p in method_value["parameters"].values()
-                        ]
-                    )
-                    + ")"
-                )
-
-            if method_value["abstract"] == "true" and class_type != "interface":
-                m = f"{tabs}{method_value['access']} abstract {method_value['return_type']} {method_value['name']}{params};\n"
-            elif method_value["abstract"] == "true" and class_type == "interface":
-                m = f"{tabs}{method_value['access']} {method_value['return_type']} {method_value['name']}{params};\n"
-            else:
-                m = f"{tabs}{method_value['access']} {method_value['return_type']} {method_value['name']}{params} {{\n\n{tabs}}}\n"
-
-            methods_string += m + "\n"
+            comment = "// TODO: Must be implemented!"
+            writer.writelines(
+                [
+                    f"{tabs}{abstract_method.access} {abstract_method.return_type} {abstract_method.name}()"
+                    f" {{\n {tabs}\t{comment} \n{tabs}}}\n\n"
+                    for abstract_method in abstract_methods
+                ]
+            )
 
-        return methods_string
+        # normal methods, the abstract ones without a body
+        modifier = "abstract " if class_type != "interface" else ""
+        declaration = ";\n\n"
+        body = f" {{\n\n{tabs}}}\n\n"
+        writer.writelines(
+            [
+                f"{tabs}{method_value.access} {modifier if method_value.abstract else ''}"
+                f"{method_value.return_type} {method_value.name}"
+                f"({', '.join([f'{p.type} {p.name}' for p in method_value.parameters])})"
+                f"{declaration if method_value.abstract else body}"
+                for method_value in methods
+            ]
+        )
 
-    def get_abstract_methods(self, syntax_tree, implements, extends, abstract_methods):
+    def get_abstract_methods(self, syntax_tree, implements, extends):
         """
         Get the abstract methods that require implementation
 
@@ -453,36 +530,12 @@ class JavaCodeGenerator(CodeGenerator):
             syntax_tree: syntax_tree of the drawio file
             implements: list of interfaces
             extends: list of classes
-            abstract_methods: list of interface methods
-        """
-
-        for i in implements:
-            interface_obj = syntax_tree[i]
-            methods = list(
-                interface_obj["methods"].values()
-            )  # take all methods from interface
-            methods.reverse()  # reverse the list so that the methods are in the correct order
-            abstract_methods += methods
-            self.get_abstract_methods(
-                syntax_tree,
-                interface_obj["relationships"]["extends"],
-                interface_obj["relationships"]["extends"],
-                abstract_methods,
-            )
 
-        for e in extends:
-            class_obj = syntax_tree[e]
-            methods = [
-                m for m in class_obj["methods"].values() if m["abstract"] == "true"
-            ]  # take only abstract methods from class
-            methods.reverse()  # reverse the list so that the methods are in the correct order
-            abstract_methods += methods
-            self.get_abstract_methods(
-                syntax_tree,
-                class_obj["relationships"]["implements"],
-                class_obj["relationships"]["extends"],
-                abstract_methods,
-            )
+        Returns:
+            abstract_methods: list of abstract methods, in order and without duplicates
+        """
+
+        return self.get_inheritance(syntax_tree).abstract_methods(implements, extends)
 
     def generate_files(self, file_path, files):
         """
@@ -503,10 +556,38 @@ class JavaCodeGenerator(CodeGenerator):
         try:
             os.makedirs(file_path, exist_ok=True)
             for file in files:
-                file_name = file[0] + ".java"
+                file_name = file[0]
                 file_contents = file[1]
                 with open(file_path + f"/{file_name}", "w") as f:
                     f.write(file_contents)
         except Exception as e:
             traceback.print_exc()
             print(f"JavaCodeGenerator.generate_files ERROR: {e}")
+
+
+def _share(generator, syntax_tree):
+    """
+    Keep the generator and the syntax tree of a forked process
+
+    Parameters:
+        generator: the JavaCodeGenerator with the resolved inheritance
+        syntax_tree: syntax_tree of the drawio file
+    """
+
+    global _shared
+    _shared = (generator, syntax_tree)
+
+
+def _generate_chunk(class_ids):
+    """
+    Generate a chunk of the top-level classes in a forked process
+
+    Parameters:
+        class_ids: ids of the classes
+
+    Returns:
+        sources: list of the source code of the classes, in their order
+    """
+
+    generator, syntax_tree = _shared
+    return [generator.generate_source(syntax_tree, _id) for _id in class_ids]
@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+
+
+class SourceWriter:
+    """
+    Collect the fragments of a source file and join them once at the end
+    """
+
+    def __init__(self, indent="\t"):
+        """
+        Parameters:
+            indent: the text of one indentation level
+        """
+
+        self.unit = indent
+        self.fragments = list()
+        # the indentation text of every open level, the current one last
+        self.levels = [""]
+
+    @property
+    def tabs(self):
+        """
+        The indentation text of the current level
+        """
+
+        return self.levels[-1]
+
+    @contextmanager
+    def indented(self):
+        """
+        Indent the fragments written in the block one level more
+        """
+
+        self.levels.append(self.levels[-1] + self.unit)
+        try:
+            yield self
+        finally:
+            self.levels.pop()
+
+    def write(self, *fragments):
+        """
+        Add the fragments to the source
+
+        Parameters:
+            fragments: the strings to be added, in order
+        """
+
+        self.fragments.extend(fragments)
+
+    def writelines(self, fragments):
+        """
+        Add the fragments of an iterable to the source
+
+        Parameters:
+            fragments: iterable of the strings to be added, in order
+        """
+
+        self.fragments.extend(fragments)
+
+    def getvalue(self):
+        """
+        Get the source written so far
+
+        Returns:
+            source: the joined fragments
+        """
+
+        return "".join(self.fragments)
@@ -0,0 +1,110 @@
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobError(Exception):
+    """
+    Expected failure of a job, its message is reported to the client
+    """
+
+
+class JobRunner:
+    """
+    Run the asynchronous jobs on a bounded pool of the worker
+    """
+
+    # minimum seconds between two progress updates written to the job store
+    progress_interval = 0.5
+
+    def __init__(self, app, store, max_workers, max_pending):
+        """
+        Parameters:
+            app: the flask application, the jobs run in its request context
+            store: the JobStore of the jobs
+            max_workers: number of jobs running at the same time
+            max_pending: number of running and queued jobs accepted by the worker
+        """
+
+        self.app = app
+        self.store = store
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self.slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, kind, owner, fn):
+        """
+        Submit a job
+
+        Parameters:
+            kind: the kind of the job
+            owner: the user that submitted the job
+            fn: function that takes a progress callback and returns the artifact bytes
+                and its download name, it raises JobError for the expected failures
+
+        Returns:
+            job_id: the id of the job, None if the worker is at capacity
+        """
+
+        if not self.slots.acquire(blocking=False):
+            return None
+
+        try:
+            job_id = self.store.create(kind, owner)
+            self.executor.submit(self._run, job_id, fn)
+        except Exception:
+            self.slots.release()
+            raise
+
+        return job_id
+
+    def _run(self, job_id, fn):
+        """
+        Run the job and record its outcome
+
+        Parameters:
+            job_id: the id of the job
+            fn: the job function
+        """
+
+        last_update = 0
+
+        def progress(stage, done=0, total=0):
+            nonlocal last_update
+            now = time.monotonic()
+            if done and done != total and now - last_update < self.progress_interval:
+                return
+            last_update = now
+            self.store.update(
+                job_id, stage=stage, progress=round(done / total, 4) if total else 0
+            )
+
+        try:
+            self.store.update(job_id, status="running", stage="started")
+
+            # a request context is needed for the database connections of the repository
+            with self.app.test_request_context():
+                artifact, download_name = fn(progress)
+
+            path = self.store.artifact_path(job_id)
+            with open(path, "wb") as f:
+                f.write(artifact)
+
+            self.store.update(
+                job_id,
+                status="succeeded",
+                stage="done",
+                progress=1,
+                artifact=path,
+                download_name=download_name,
+            )
+        except JobError as e:
+            self.store.update(job_id, status="failed", error=str(e))
+        except Exception as e:
+            traceback.print_exc()
+            print(f"JobRunner._run ERROR: {e}")
+            self.store.update(job_id, status="failed", error="Job failed")
+        finally:
+            self.slots.release()
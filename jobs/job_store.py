@@ -0,0 +1,156 @@
+import os
+import time
+import sqlite3
+from uuid import uuid4
+from contextlib import contextmanager
+
+
+class JobStore:
+    """
+    SQLite store for the asynchronous jobs, shared by the gunicorn workers
+    """
+
+    def __init__(self, directory):
+        """
+        Parameters:
+            directory: directory for the job database and the job artifacts
+        """
+
+        self.directory = directory
+        self.database = os.path.join(directory, "jobs.sqlite3")
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS job (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    owner TEXT,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    artifact TEXT,
+                    download_name TEXT,
+                    pid INTEGER,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.database, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def artifact_path(self, job_id):
+        """
+        Get the path of the job artifact
+
+        Parameters:
+            job_id: the id of the job
+
+        Returns:
+            path: path of the artifact file
+        """
+
+        return os.path.join(self.directory, f"{job_id}.zip")
+
+    def create(self, kind, owner):
+        """
+        Create a queued job
+
+        Parameters:
+            kind: the kind of the job
+            owner: the user that submitted the job
+
+        Returns:
+            job_id: the id of the job
+        """
+
+        job_id = str(uuid4())
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO job (id, kind, owner, status, stage, pid, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, owner, "queued", "queued", os.getpid(), now, now),
+            )
+
+        return job_id
+
+    def update(self, job_id, **fields):
+        """
+        Update the fields of the job
+
+        Parameters:
+            job_id: the id of the job
+            fields: the column values to be updated
+        """
+
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as db:
+            db.execute(
+                f"UPDATE job SET {columns} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def get(self, job_id):
+        """
+        Get the job
+
+        Parameters:
+            job_id: the id of the job
+
+        Returns:
+            job: dictionary of the job columns, None if the job does not exist
+        """
+
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM job WHERE id = ?", (job_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        job = dict(row)
+        if job["status"] in ("queued", "running") and not self._is_alive(job["pid"]):
+            # the worker running the job exited before finishing it
+            job.update(status="failed", error="The job was interrupted")
+            self.update(job_id, status=job["status"], error=job["error"])
+
+        return job
+
+    def delete_expired(self, ttl):
+        """
+        Delete the finished jobs and their artifacts older than the time to live
+
+        Parameters:
+            ttl: seconds the finished jobs are kept
+        """
+
+        expires = time.time() - ttl
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT id FROM job WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+                (expires,),
+            ).fetchall()
+            for row in rows:
+                try:
+                    os.remove(self.artifact_path(row["id"]))
+                except FileNotFoundError:
+                    pass
+                db.execute("DELETE FROM job WHERE id = ?", (row["id"],))
+
+    def _is_alive(self, pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+
+        return True
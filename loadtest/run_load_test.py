@@ -0,0 +1,312 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import itertools
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from benchmarks.synthetic_diagram import SyntheticDiagram
+from benchmarks.run_benchmarks import git_commit
+
+ENDPOINTS = ("code", "document", "graph")
+
+
+def percentile(values, fraction):
+    """
+    Get the nearest-rank percentile of the values
+
+    Parameters:
+        values: sorted list of the values
+        fraction: the percentile as a fraction
+
+    Returns:
+        value: the percentile, None if there are no values
+    """
+
+    if not values:
+        return None
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Server:
+    """
+    gunicorn serving the service with the local stand-ins
+    """
+
+    def __init__(self, workers, threads, directory):
+        """
+        Parameters:
+            workers: number of gunicorn worker processes
+            threads: number of threads per worker
+            directory: directory for the state of the stand-ins, caches and metrics
+        """
+
+        self.workers = workers
+        self.threads = threads
+        self.directory = directory
+        self.process = None
+
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        env = {
+            "LOADTEST_DIR": self.directory,
+            "METRICS_DIR": os.path.join(self.directory, "metrics"),
+            "SINGLE_FLIGHT_DIR": os.path.join(self.directory, "single-flight"),
+            "JOBS_DIR": os.path.join(self.directory, "jobs"),
+            **os.environ,
+        }
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "-w",
+                str(self.workers),
+                "--threads",
+                str(self.threads),
+                "-b",
+                f"127.0.0.1:{self.port}",
+                "--log-level",
+                "warning",
+                "loadtest.wsgi:app",
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("gunicorn exited during start-up")
+            try:
+                urllib.request.urlopen(f"{self.url}/metrics", timeout=1).read()
+                return self
+            except OSError:
+                time.sleep(0.2)
+
+        self.__exit__()
+        raise RuntimeError("gunicorn did not start in 30 seconds")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+class LoadTest:
+    """
+    Drive a fixed number of concurrent clients against the service for a duration
+    """
+
+    def __init__(self, url, mix, diagrams, project, timeout=60):
+        """
+        Parameters:
+            url: base url of the service
+            mix: dictionary of the relative weights of the endpoints
+            diagrams: list of the encoded diagrams the code requests cycle through
+            project: the project of the document and graph requests
+            timeout: seconds before a request counts as failed
+        """
+
+        self.url = url
+        self.schedule = [name for name in ENDPOINTS for _ in range(mix.get(name, 0))]
+        self.diagrams = diagrams
+        self.project = project
+        self.timeout = timeout
+
+    def request(self, endpoint, n):
+        """
+        Build the n-th request to an endpoint
+
+        Returns:
+            path: the path of the endpoint
+            body: the JSON body
+        """
+
+        if endpoint == "code":
+            return "/api/generate-code", {
+                "id": f"loadtest-{n}",
+                "title": f"Diagram{n}",
+                "data": self.diagrams[n % len(self.diagrams)],
+            }
+        if endpoint == "document":
+            return "/api/generate-document", {"project": self.project, "classType": 1}
+        return "/api/generate-graph", {"project": self.project}
+
+    def client(self, index, deadline, counter, samples):
+        while time.monotonic() < deadline:
+            n = next(counter)
+            endpoint = self.schedule[n % len(self.schedule)]
+            path, body = self.request(endpoint, n)
+            request = urllib.request.Request(
+                self.url + path,
+                data=json.dumps(body).encode("utf8"),
+                headers={
+                    "Content-Type": "application/json",
+                    "X-User": f"user-{index}",
+                },
+            )
+
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError:
+                status = None
+            samples.append((endpoint, time.perf_counter() - start, status))
+
+    def run(self, concurrency, duration):
+        """
+        Run the clients
+
+        Parameters:
+            concurrency: number of concurrent clients
+            duration: seconds the clients send requests
+
+        Returns:
+            report: dictionary of the latencies, throughput and error rates by endpoint
+        """
+
+        samples = []
+        counter = itertools.count()
+        deadline = time.monotonic() + duration
+        threads = [
+            threading.Thread(target=self.client, args=(i, deadline, counter, samples))
+            for i in range(concurrency)
+        ]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        report = {"concurrency": concurrency, "seconds": elapsed, "endpoints": dict()}
+        for endpoint in ENDPOINTS + ("all",):
+            selected = [s for s in samples if endpoint in ("all", s[0])]
+            if not selected:
+                continue
+            latencies = sorted(latency for _, latency, _ in selected)
+            errors = sum(1 for _, _, status in selected if not status or status >= 400)
+            report["endpoints"][endpoint] = {
+                "requests": len(selected),
+                "errors": errors,
+                "error_rate": errors / len(selected),
+                "throughput": len(selected) / elapsed,
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+            }
+
+        return report
+
+
+def parse_mix(value):
+    mix = dict()
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load test the generate endpoints against gunicorn with local database stand-ins"
+    )
+    parser.add_argument(
+        "--url", help="url of a running service, by default gunicorn is started"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument(
+        "--threads", type=int, default=1, help="gunicorn threads per worker"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16],
+        help="numbers of concurrent clients, one run each",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30, help="seconds of every run"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default="code=8,document=1,graph=1",
+        help="relative weights of the code, document and graph requests",
+    )
+    parser.add_argument(
+        "--classes", type=int, default=50, help="classes per synthetic diagram"
+    )
+    parser.add_argument(
+        "--diagrams",
+        type=int,
+        default=20,
+        help="distinct diagrams, repeated diagrams are served from the cache",
+    )
+    parser.add_argument("--project", default="loadtest")
+    parser.add_argument("--output", help="path of the JSON results")
+    args = parser.parse_args(argv)
+
+    diagrams = [
+        SyntheticDiagram(classes=args.classes, seed=seed).encoded()
+        for seed in range(args.diagrams)
+    ]
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "concurrency")
+        },
+        "runs": [],
+    }
+
+    def run_all(url):
+        load_test = LoadTest(url, args.mix, diagrams, args.project)
+        print(
+            f"{'clients':>7} {'endpoint':<9} {'requests':>8} {'req/s':>8} {'errors':>7}"
+            f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for concurrency in args.concurrency:
+            report = load_test.run(concurrency, args.duration)
+            results["runs"].append(report)
+            for endpoint, stats in report["endpoints"].items():
+                print(
+                    f"{concurrency:>7} {endpoint:<9} {stats['requests']:>8}"
+                    f" {stats['throughput']:>8.1f} {stats['error_rate']:>6.1%}"
+                    f" {stats['p50'] * 1000:>8.1f} {stats['p95'] * 1000:>8.1f}"
+                    f" {stats['p99'] * 1000:>8.1f}"
+                )
+
+    if args.url:
+        run_all(args.url)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            with Server(args.workers, args.threads, directory) as server:
+                run_all(server.url)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import os
+import json
+import sqlite3
+import threading
+from uuid import uuid4
+from copy import deepcopy
+from collections import deque
+from database.repository import Repository
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS class (
+    id TEXT, class_type_id INTEGER, name_ TEXT, inner_class INTEGER, diagram_id TEXT
+);
+CREATE TABLE IF NOT EXISTS property (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    access_type_id INTEGER, name_ TEXT, type_ TEXT, class_id TEXT
+);
+CREATE TABLE IF NOT EXISTS method (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    access_type_id INTEGER, abstract INTEGER, name_ TEXT, return_type TEXT, class_id TEXT
+);
+CREATE TABLE IF NOT EXISTS parameter (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, name_ TEXT, type_ TEXT, method_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS relationship (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    relationship_type_id INTEGER, parent_class_id TEXT, child_class_id TEXT
+);
+CREATE INDEX IF NOT EXISTS class_diagram ON class (diagram_id);
+"""
+
+
+def document_rows(project, class_type, count):
+    """
+    Rows of the document_generate_table procedure: diagrams, classes, methods and parameters
+
+    Parameters:
+        project: the project name
+        class_type: the class type
+        count: number of rows
+
+    Returns:
+        rows: list of row dictionaries
+    """
+
+    return [
+        {
+            "parameter_project": project,
+            "parameter_class_type_id": class_type,
+            "diagram_id": i // 100,
+            "diagram_title": f"Diagram{i // 100}",
+            "diagram_description": f"Description of the diagram {i // 100}",
+            "class_id": f"class-{i // 20}",
+            "class_name": f"Class{i // 20}",
+            "class_inner_class": 0,
+            "class_type_id": class_type,
+            "class_type_name": "class",
+            "method_id": i // 4,
+            "method_abstract": 0,
+            "method_name": f"method{i // 4}",
+            "method_return_type": "void",
+            "access_type_id": 1,
+            "access_type_name": "public",
+            "parameter_id": i,
+            "parameter_name": f"parameter{i}",
+            "parameter_type": "int",
+        }
+        for i in range(count)
+    ]
+
+
+def graph_rows(project, count):
+    """
+    Rows of the graph_generate_table procedure: relationships between classes
+
+    Parameters:
+        project: the project name
+        count: number of rows
+
+    Returns:
+        rows: list of row dictionaries
+    """
+
+    classes = max(count // 2, 2)
+    return [
+        {
+            "parameter_project": project,
+            "diagram_title": f"Diagram{i // 100}",
+            "parent_class_id": f"class-{i % classes}",
+            "parent_class_name": f"Class{i % classes}",
+            "parent_class_inner_class": 0,
+            "parent_class_type_name": "class",
+            "child_class_id": f"class-{(i * 7 + 1) % classes}",
+            "child_class_name": f"Class{(i * 7 + 1) % classes}",
+            "child_class_inner_class": 0,
+            "child_class_type_name": "class",
+            "relationship_id": f"relationship-{i}",
+            "relationship_type_name": "association",
+            "relationship_parent_class_id": f"class-{i % classes}",
+            "relationship_child_class_id": f"class-{(i * 7 + 1) % classes}",
+        }
+        for i in range(count)
+    ]
+
+
+class LocalMySQL:
+    """
+    SQLite stand-in for the MySQL connection, with the generate procedures
+    filling their result tables with synthetic rows
+    """
+
+    def __init__(self, path, document_rows=200, graph_rows=200):
+        """
+        Parameters:
+            path: path of the SQLite database
+            document_rows: number of rows of the document procedure
+            graph_rows: number of rows of the graph procedure
+        """
+
+        self.path = path
+        self.document_rows = document_rows
+        self.graph_rows = graph_rows
+        self.local = threading.local()
+
+    def get_db(self):
+        """
+        Get the connection of the current thread
+
+        Returns:
+            connection: the SQLite connection
+        """
+
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = lambda cursor, row: {
+                column[0]: value for column, value in zip(cursor.description, row)
+            }
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self.local.connection = connection
+
+        return LocalConnection(self, connection)
+
+
+class LocalConnection:
+    def __init__(self, mysql, connection):
+        self.mysql = mysql
+        self.connection = connection
+
+    def cursor(self):
+        return LocalCursor(self.mysql, self.connection.cursor())
+
+    def commit(self):
+        self.connection.commit()
+
+
+class LocalCursor:
+    """
+    Cursor translating the MySQL parameter style and procedure calls to SQLite
+    """
+
+    def __init__(self, mysql, cursor):
+        self.mysql = mysql
+        self.cursor = cursor
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+    def execute(self, query, args=()):
+        self.cursor.execute(query.replace("%s", "?"), args)
+
+    def executemany(self, query, args):
+        self.cursor.executemany(query.replace("%s", "?"), args)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def callproc(self, procedure, args):
+        if procedure == "document_generate_table":
+            table = "document_table"
+            rows = document_rows(*args, self.mysql.document_rows)
+        elif procedure == "graph_generate_table":
+            table = "graph_table"
+            rows = graph_rows(*args, self.mysql.graph_rows)
+        else:
+            raise ValueError(f"Unknown procedure {procedure}")
+
+        columns = list(rows[0].keys()) if rows else ["id"]
+        self.cursor.execute(f"DROP TABLE IF EXISTS temp.{table}")
+        self.cursor.execute(f"CREATE TEMP TABLE {table} ({', '.join(columns)})")
+        self.cursor.executemany(
+            f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})",
+            [tuple(row.values()) for row in rows],
+        )
+
+
+class LocalMongoDatabase:
+    """
+    In-memory stand-in for the MongoDB database
+    """
+
+    def __init__(self, max_documents=100):
+        """
+        Parameters:
+            max_documents: number of the most recent inserted documents that are kept
+        """
+
+        self.collections = dict()
+        self.max_documents = max_documents
+        self.lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self.lock:
+            if name not in self.collections:
+                self.collections[name] = LocalMongoCollection(self.max_documents)
+            return self.collections[name]
+
+
+class LocalMongoCollection:
+    def __init__(self, max_documents):
+        self.documents = deque(maxlen=max_documents)
+        self.lock = threading.Lock()
+
+    def find_one(self, query):
+        with self.lock:
+            for document in self.documents:
+                if all(document.get(key) == value for key, value in query.items()):
+                    return deepcopy(document)
+        return None
+
+    def insert_one(self, document):
+        document.setdefault("_id", uuid4().hex)
+        with self.lock:
+            self.documents.append(deepcopy(document))
+
+
+class LocalArangoDatabase:
+    """
+    In-memory stand-in for the ArangoDB database, the graphs live only for the request
+    """
+
+    def create_graph(self, name):
+        return LocalArangoGraph(name)
+
+
+class LocalArangoGraph:
+    def __init__(self, name):
+        self.name = name
+
+    def create_vertex_collection(self, name):
+        return LocalArangoCollection(name)
+
+    def create_edge_definition(self, edge_collection, **kwargs):
+        return LocalArangoCollection(edge_collection)
+
+
+class LocalArangoCollection:
+    def __init__(self, name):
+        self.name = name
+        self.documents = dict()
+
+    def get(self, document):
+        return self.documents.get(document["_key"])
+
+    def insert(self, document):
+        self.documents[document["_key"]] = {
+            **document,
+            "_id": f"{self.name}/{document['_key']}",
+        }
+
+    def all(self):
+        return iter(list(self.documents.values()))
+
+
+class LocalRepository(Repository):
+    """
+    Repository backed by the local stand-ins instead of MySQL, MongoDB and ArangoDB
+    """
+
+    mysql = None
+    mongo = None
+    arango = LocalArangoDatabase()
+
+    @classmethod
+    def configure(cls, directory, document_rows=200, graph_rows=200):
+        """
+        Set up the stand-ins and the meta descriptions
+
+        Parameters:
+            directory: directory of the SQLite database
+            document_rows: number of rows of the document procedure
+            graph_rows: number of rows of the graph procedure
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        cls.mysql = LocalMySQL(
+            os.path.join(directory, "mysql.sqlite3"), document_rows, graph_rows
+        )
+        cls.mongo = LocalMongoDatabase()
+
+        for name in ("meta-document", "meta-graph"):
+            with open(f"meta/{name}.json", "r") as f:
+                cls.mongo["meta"].insert_one(json.load(f))
+
+    def mysql_db(self):
+        return self.mysql.get_db()
+
+    def mongo_db(self):
+        return self.mongo
+
+    def arango_db(self):
+        return self.arango
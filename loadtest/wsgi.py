@@ -0,0 +1,58 @@
+"""
+Load test entry point of the service: gunicorn loadtest.wsgi:app
+
+The Cognito authentication is stubbed and the repository is backed by the local
+stand-ins, every request is authenticated as the X-User header with access to
+the LOADTEST_PROJECT project.
+"""
+
+import os
+import tempfile
+
+for key, value in {
+    "MYSQL_DATABASE_PORT": "3306",
+    "MONGODB_DATABASE": "loadtest",
+    "ARANGODB_HOST": "http://localhost:8529",
+    "AWS_DEFAULT_REGION": "eu-west-1",
+    "AWS_COGNITO_USER_POOL_ID": "loadtest",
+    "AWS_COGNITO_USER_POOL_CLIENT_ID": "loadtest",
+}.items():
+    os.environ.setdefault(key, value)
+
+from flask import request
+import config
+import database.repository
+from loadtest.stand_ins import LocalRepository
+
+
+class StubAuthentication:
+    """
+    Stand-in for AWSCognitoAuthentication
+    """
+
+    def __init__(self, project):
+        self.project = project
+
+    def authentication_required(self, view):
+        return view
+
+    @property
+    def claims(self):
+        return {
+            "sub": request.headers.get("X-User", "loadtest"),
+            "cognito:groups": [f"PROJECT_{self.project}_loadtest"],
+        }
+
+
+config.aws_auth = StubAuthentication(os.getenv("LOADTEST_PROJECT", "loadtest"))
+LocalRepository.configure(
+    os.getenv(
+        "LOADTEST_DIR",
+        os.path.join(tempfile.gettempdir(), "generator-service", "loadtest"),
+    ),
+    int(os.getenv("LOADTEST_DOCUMENT_ROWS", 200)),
+    int(os.getenv("LOADTEST_GRAPH_ROWS", 200)),
+)
+database.repository.Repository = LocalRepository
+
+from app import app
@@ -0,0 +1,86 @@
+import re
+import html
+
+# the <hr> separators between the name, the properties and the methods
+HR_PATTERN = re.compile("<hr .*?>")
+# comments, script and style elements with their content, and any other tag
+MARKUP_PATTERN = re.compile(
+    r"<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>|<[A-Za-z/!?][^>]*>",
+    re.IGNORECASE | re.DOTALL,
+)
+WHITESPACE = " \t\n\r\f"
+
+
+class HtmlLabelExtractor:
+    """
+    Extract the text lines of an HTML formatted class label, the same text
+    BeautifulSoup returns for every line, without building a soup per line
+    """
+
+    def extract(self, value):
+        """
+        Split the label on the <hr> separators and newlines and get the text of every line
+
+        Parameters:
+          value: the HTML label of the class cell
+
+        Returns:
+          lines: list of the text of the lines, without the separators
+        """
+
+        split_values = HR_PATTERN.sub("\n<hr>\n", value).lstrip("\n").split("\n")
+
+        return [self.text(val) for val in split_values if val != "<hr>"]
+
+    def text(self, value):
+        """
+        Strip the tags and decode the entities of an HTML fragment
+
+        Like the lxml HTML parser, the whitespace before the first text or tag is
+        dropped, and like BeautifulSoup, any other string of only whitespace is
+        collapsed to a newline if it has one, otherwise to a space.
+
+        Parameters:
+          value: the HTML fragment
+
+        Returns:
+          text: the text of the fragment
+        """
+
+        strings = []
+        started = False
+        position = 0
+        for markup in MARKUP_PATTERN.finditer(value):
+            started = self._add_string(
+                strings, value[position : markup.start()], started
+            )
+            started = started or markup.group()[1] != "!"
+            position = markup.end()
+        self._add_string(strings, value[position:], started)
+
+        return "".join(strings)
+
+    def _add_string(self, strings, raw, started):
+        """
+        Decode a string between two tags and add it to the strings
+
+        Parameters:
+          strings: list of the decoded strings
+          raw: the string between the tags
+          started: True if text or a tag came before the string
+
+        Returns:
+          started: True if text or a tag came before or in the string
+        """
+
+        if not started:
+            raw = raw.lstrip(WHITESPACE)
+        if not raw:
+            return started
+
+        string = html.unescape(raw) if "&" in raw else raw
+        if not string.strip(WHITESPACE):
+            string = "\n" if "\n" in string else " "
+        strings.append(string)
+
+        return True
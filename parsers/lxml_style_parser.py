@@ -0,0 +1,106 @@
+import io
+import traceback
+from lxml import etree
+from parsers.style_parser import StyleParser
+
+
+class LxmlStyleParser(StyleParser):
+    """
+    Parse the XML into a style tree, streaming the cells with lxml in one pass
+    """
+
+    def parse(self, di_xml):
+        """
+        Convert the XML to a style tree, identical to the one of the StyleParser
+
+        Parameters:
+          di_xml: the decoded and decompressed DrawIO XML
+
+        Returns:
+          style_tree: dictionary of the extracted elements from the XML
+        """
+
+        print("<<< CONVERTING XML TO STYLE TREE >>>")
+
+        try:
+            style_tree = dict()
+
+            grandparent = None
+            root_parent = None
+
+            relationship_list = list()
+
+            depth = 0
+            root_depth = None
+            for event, element in etree.iterparse(
+                io.BytesIO(di_xml.encode("utf8")),
+                events=("start", "end"),
+                resolve_entities=False,
+                no_network=True,
+            ):
+                if event == "end":
+                    depth -= 1
+                    if root_depth is None:
+                        continue
+                    if depth == root_depth:
+                        # the cell is processed, free it and its processed siblings
+                        element.clear()
+                        while element.getprevious() is not None:
+                            del element.getparent()[0]
+                    elif depth < root_depth:
+                        break
+                    continue
+
+                depth += 1
+                if root_depth is None:
+                    if element.tag == "root":
+                        root_depth = depth
+                    continue
+                if depth != root_depth + 1:
+                    continue
+
+                child_attrs = dict(element.attrib)
+
+                if "parent" in child_attrs:
+                    if (
+                        child_attrs["parent"] == grandparent
+                    ):  # found the root parent element
+                        root_parent = child_attrs["id"]
+                        style_tree["root"] = self._add_root_parent(child_attrs)
+                    elif (
+                        "source" in child_attrs or "target" in child_attrs
+                    ):  # found a relationship element
+                        if "source" not in child_attrs:
+                            print(
+                                f"'source' not present in {child_attrs['id']} relationship"
+                            )
+                        elif "target" not in child_attrs:
+                            print(
+                                f"'target' not present in {child_attrs['id']} relationship"
+                            )
+                        else:
+                            relationship_list.append(child_attrs)
+                    else:  # found a cell element
+                        style_tree["root"]["cells"][
+                            child_attrs["id"]
+                        ] = self._add_cells(child_attrs, root_parent)
+                else:  # found the grandparent element
+                    if grandparent is None:
+                        grandparent = child_attrs["id"]
+
+            if root_depth is None:
+                raise ValueError("the XML has no root element")
+
+            style_tree["index"] = self._build_index(style_tree, root_parent)
+
+            # need to process the relationships at the end to get the right source and target
+            for child_attrs in relationship_list:
+                style_tree["root"]["relationships"][
+                    child_attrs["id"]
+                ] = self._add_relationships(child_attrs, style_tree, root_parent)
+
+            return style_tree
+        except Exception as e:
+            traceback.print_exc()
+            print(f"LxmlStyleParser.parse ERROR: {e}")
+            return False
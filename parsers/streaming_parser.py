@@ -0,0 +1,239 @@
+import traceback
+from lxml import etree
+from decoders.decoder import Decoder, DiagramTooLargeError
+from parsers.parser import Parser
+from parsers.lxml_style_parser import LxmlStyleParser
+from parsers.syntax_parser import SyntaxParser
+
+
+class OutOfOrderCell(Exception):
+    """
+    A cell comes before its parent or repeats an id, so it can not be streamed
+    """
+
+
+class StreamingParser(Parser):
+    """
+    Parse the encoded DrawIO file straight into the syntax tree, reading the
+    decompressed XML a chunk at a time without building the style tree
+    """
+
+    def __init__(self, chunk_size=64 * 1024, decoder=None):
+        """
+        Parameters:
+          chunk_size: maximum number of decompressed bytes that are parsed at a time
+          decoder: the Decoder with the size limits, one with the default limits if None
+        """
+
+        self.chunk_size = chunk_size
+        self.decoder = decoder or Decoder()
+        self.style_parser = LxmlStyleParser()
+        self.cells = 0
+        self.relationships = 0
+
+    def parse(self, encoded_xml):
+        """
+        Convert the encoded DrawIO file to the syntax tree, the same tree the
+        Decoder, the LxmlStyleParser and the SyntaxParser build one after another
+
+        The cells are converted as they are read, which needs every cell to come
+        after its parent, as draw.io writes them. A diagram that does not is
+        parsed with the separate stages instead.
+
+        Parameters:
+          encoded_xml: encoded .drawio file content
+
+        Returns:
+          syntax_tree: the SyntaxTree that is used by the generators, False if unsuccessful
+
+        Raises:
+          DiagramTooLargeError: if the file or the diagram is over the size limits
+        """
+
+        print("<<< CONVERTING DRAWIO FILE TO SYNTAX TREE >>>")
+
+        try:
+            return self._parse(self.decoder.stream(encoded_xml, self.chunk_size))
+        except OutOfOrderCell as e:
+            print(f"{e}, parsing the diagram in separate stages")
+            return self._parse_stages(self.decoder.convert(encoded_xml))
+        except DiagramTooLargeError:
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            print(f"StreamingParser.parse ERROR: {e}")
+            return False
+
+    def parse_page(self, page):
+        """
+        Convert a page of the DrawIO file to the syntax tree, like parse
+
+        Parameters:
+          page: one of the pages of the Decoder
+
+        Returns:
+          syntax_tree: the SyntaxTree of the page, False if unsuccessful
+
+        Raises:
+          DiagramTooLargeError: if the diagram of the page is over the size limit
+        """
+
+        print(f"<<< CONVERTING PAGE {page['name']} TO SYNTAX TREE >>>")
+
+        try:
+            return self._parse(self.decoder.stream_page(page, self.chunk_size))
+        except OutOfOrderCell as e:
+            print(f"{e}, parsing the page in separate stages")
+            return self._parse_stages(self.decoder.convert_page(page))
+        except DiagramTooLargeError:
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            print(f"StreamingParser.parse_page ERROR: {e}")
+            return False
+
+    def _parse(self, chunks):
+        """
+        Stream the cells of the decompressed XML into the SyntaxParser
+
+        Parameters:
+          chunks: the chunks of the decompressed XML
+
+        Returns:
+          syntax_tree: the SyntaxTree of the diagram
+        """
+
+        syntax_parser = SyntaxParser()
+        xml_parser = etree.XMLPullParser(
+            events=("start", "end"), resolve_entities=False, no_network=True
+        )
+
+        grandparent = None
+        root_parent = None
+
+        seen = set()  # ids of the elements read so far
+        top_level = dict()  # the class cell of every cell below the root parent
+        relationship_ids = dict()
+        relationship_list = list()
+
+        depth = 0
+        root_depth = None
+        root_done = False
+        for chunk in chunks:
+            if root_done:
+                # the rest of the XML is not parsed, only checked to decompress
+                continue
+
+            xml_parser.feed(chunk.encode("utf8"))
+            for event, element in xml_parser.read_events():
+                if event == "end":
+                    depth -= 1
+                    if root_depth is None:
+                        continue
+                    if depth == root_depth:
+                        # the cell is processed, free it and its processed siblings
+                        element.clear()
+                        while element.getprevious() is not None:
+                            del element.getparent()[0]
+                    elif depth < root_depth:
+                        root_done = True
+                        break
+                    continue
+
+                depth += 1
+                if root_depth is None:
+                    if element.tag == "root":
+                        root_depth = depth
+                    continue
+                if depth != root_depth + 1:
+                    continue
+
+                child_attrs = dict(element.attrib)
+
+                if "parent" in child_attrs:
+                    if (
+                        child_attrs["parent"] == grandparent
+                    ):  # found the root parent element, the cells start over
+                        root_parent = child_attrs["id"]
+                        top_level = dict()
+                        self.cells = 0
+                        syntax_parser.start(root_parent)
+                    elif (
+                        "source" in child_attrs or "target" in child_attrs
+                    ):  # found a relationship element
+                        if "source" not in child_attrs:
+                            print(
+                                f"'source' not present in {child_attrs['id']} relationship"
+                            )
+                        elif "target" not in child_attrs:
+                            print(
+                                f"'target' not present in {child_attrs['id']} relationship"
+                            )
+                        else:
+                            relationship_ids[child_attrs["id"]] = None
+                            relationship_list.append(child_attrs)
+                    else:  # found a cell element
+                        if root_parent is None:
+                            raise KeyError("root")
+                        cell_id = child_attrs["id"]
+                        parent_id = child_attrs["parent"]
+                        if cell_id in seen or parent_id not in seen:
+                            raise OutOfOrderCell(f"cell {cell_id} is out of order")
+
+                        cell = self.style_parser._add_cells(child_attrs, root_parent)
+                        if parent_id == root_parent:
+                            top_level[cell_id] = cell_id
+                        elif parent_id in top_level:
+                            top_level[cell_id] = top_level[parent_id]
+                        self.cells += 1
+
+                        syntax_parser.add_cell(cell_id, cell, relationship_ids)
+                else:  # found the grandparent element
+                    if grandparent is None:
+                        grandparent = child_attrs["id"]
+
+                if "id" in child_attrs:
+                    seen.add(child_attrs["id"])
+
+        if not root_done:
+            xml_parser.close()
+
+        if root_depth is None:
+            raise ValueError("the XML has no root element")
+        if root_parent is None:
+            raise KeyError("root")
+
+        relationships = dict()
+        for child_attrs in relationship_list:
+            relationships[child_attrs["id"]] = {
+                "id": child_attrs["id"],
+                "parent_id": child_attrs["parent"],
+                "source": top_level[child_attrs["source"]],
+                "target": top_level[child_attrs["target"]],
+                "style": self.style_parser._get_style(child_attrs["style"]),
+            }
+        self.relationships = len(relationships)
+
+        return syntax_parser.finish(relationships.values())
+
+    def _parse_stages(self, decoded_xml):
+        """
+        Convert the decompressed XML with the LxmlStyleParser and the SyntaxParser
+
+        Parameters:
+          decoded_xml: the decoded and decompressed XML, False if the Decoder failed
+
+        Returns:
+          syntax_tree: the SyntaxTree of the diagram, False if unsuccessful
+        """
+
+        if not decoded_xml:
+            return False
+
+        style_tree = self.style_parser.parse(decoded_xml)
+        if not style_tree:
+            return False
+
+        self.cells = len(style_tree["root"]["cells"])
+        self.relationships = len(style_tree["root"]["relationships"])
+        return SyntaxParser().parse(style_tree)
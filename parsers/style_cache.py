@@ -0,0 +1,107 @@
+import sys
+import threading
+from functools import lru_cache
+from utilities.metrics import metrics
+
+
+class FrozenStyle(dict):
+    """
+    Read-only style dictionary, shared by all the cells with the same style attribute
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("the style is shared and read-only, change a copy of it")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenStyle, (dict(self),))
+
+
+class StyleCache:
+    """
+    Bounded memo of the parsed style attributes, with interned keys and values
+    """
+
+    def __init__(self, max_entries=4096):
+        """
+        Parameters:
+            max_entries: number of the most recently used styles that are kept
+        """
+
+        self.get = lru_cache(maxsize=max_entries)(self.parse)
+        self.lock = threading.Lock()
+        self.reported = {"hit": 0, "miss": 0, "evictions": 0}
+
+    def parse(self, style_attrs):
+        """
+        Convert the style attribute to a dictionary
+
+        Parameters:
+          style_attrs: style attribute of the element
+
+        Returns:
+          style_dict: style attribute as a read-only dictionary
+        """
+
+        style_list = style_attrs.split(";")
+        style_dict = dict()
+
+        for s in style_list:
+            if "=" in s:
+                s_list = s.split("=")
+                style_dict[sys.intern(s_list[0])] = sys.intern(s_list[1])
+            else:
+                if s:
+                    style_dict["type"] = sys.intern(s)
+
+        return FrozenStyle(style_dict)
+
+    def stats(self):
+        """
+        Get the cache counters
+
+        Returns:
+            stats: dictionary of the cache counters
+        """
+
+        info = self.get.cache_info()
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            # every miss of a full cache evicts the least recently used style
+            "evictions": info.misses - info.currsize,
+            "entries": info.currsize,
+        }
+
+    def report(self):
+        """
+        Add the counters since the last report to the metrics
+        """
+
+        stats = self.stats()
+        with self.lock:
+            current = {
+                "hit": stats["hits"],
+                "miss": stats["misses"],
+                "evictions": stats["evictions"],
+            }
+            delta = {key: current[key] - self.reported[key] for key in current}
+            self.reported = current
+
+        for result in ("hit", "miss"):
+            if delta[result]:
+                metrics.inc(
+                    "generator_cache_requests_total",
+                    delta[result],
+                    cache="style",
+                    result=result,
+                )
+        if delta["evictions"]:
+            metrics.inc(
+                "generator_cache_evictions_total", delta["evictions"], cache="style"
+            )
+
+
+style_cache = StyleCache()
@@ -1,8 +1,9 @@
 import traceback
 from bs4 import BeautifulSoup as bs
 from collections import OrderedDict
-import re
 from parsers.parser import Parser
+from parsers.html_label_extractor import HtmlLabelExtractor
+from parsers.style_cache import style_cache, FrozenStyle
 
 
 class StyleParser(Parser):
@@ -10,6 +11,8 @@ class StyleParser(Parser):
     Parse the XML into a style tree
     """
 
+    html_label_extractor = HtmlLabelExtractor()
+
     def parse(self, di_xml):
         """
         Convert the XML to a style tree
@@ -67,6 +70,8 @@ class StyleParser(Parser):
 
                 child = next(root_children, None)
 
+            style_tree["index"] = self._build_index(style_tree, root_parent)
+
             # need to process the relationships at the end to get the right source and target
             for child_attrs in relationship_list:
                 style_tree["root"]["relationships"][
@@ -97,30 +102,74 @@ class StyleParser(Parser):
             "relationships": dict(),
         }
 
+    def _build_index(self, style_tree, root_parent):
+        """
+        Index the hierarchy of the cells
+
+        Parameters:
+          style_tree: the style tree with the cells
+          root_parent: the id of the root parent element
+
+        Returns:
+          index: dictionary containing the children of every parent, the top level
+            ancestor (the class cell) and the depth of every cell below the root parent
+        """
+
+        cells = style_tree["root"]["cells"]
+        children = {root_parent: []}
+        top_level = dict()
+        depth = dict()
+        detached = set()  # cells whose parent chain leaves the cells
+
+        for cell_id, cell in cells.items():
+            children.setdefault(cell["parent_id"], []).append(cell_id)
+
+        for cell_id in cells:
+            # walk up to an indexed cell, then index the walked path from the top
+            path = []
+            on_path = set()
+            current = cell_id
+            while current not in top_level:
+                if current in detached or current not in cells:
+                    detached.update(path)
+                    path = None
+                    break
+                if current in on_path:
+                    raise ValueError(f"cyclic parent reference at cell {current}")
+
+                path.append(current)
+                on_path.add(current)
+                parent_id = cells[current]["parent_id"]
+                if parent_id == root_parent:
+                    top_level[current] = current
+                    depth[current] = 1
+                    path.pop()
+                    break
+                current = parent_id
+
+            for child_id in reversed(path or []):
+                parent_id = cells[child_id]["parent_id"]
+                top_level[child_id] = top_level[parent_id]
+                depth[child_id] = depth[parent_id] + 1
+
+        return {"children": children, "top_level": top_level, "depth": depth}
+
     def _add_relationships(self, attrs, style_tree, root_parent):
         """
         Format dictionary for the relationships
 
         Parameters:
           attrs: the relationship element attributes
-          style_tree: the style tree, needed to find the parent target
+          style_tree: the style tree with the index, needed to find the parent target
           root_parent: the id of the root parent element
 
         Returns:
           root_parent_dict: dictionary containing id, parent_id, cells, connections
         """
 
-        source = attrs["source"]
-        parent_source = style_tree["root"]["cells"][source]["parent_id"]
-        while parent_source != root_parent:
-            source = parent_source
-            parent_source = style_tree["root"]["cells"][source]["parent_id"]
-
-        target = attrs["target"]
-        parent_target = style_tree["root"]["cells"][target]["parent_id"]
-        while parent_target != root_parent:
-            target = parent_target
-            parent_target = style_tree["root"]["cells"][target]["parent_id"]
+        top_level = style_tree["index"]["top_level"]
+        source = top_level[attrs["source"]]
+        target = top_level[attrs["target"]]
 
         style = self._get_style(attrs["style"])
 
@@ -151,16 +200,11 @@ class StyleParser(Parser):
         if (
             "type" not in style.keys() and attrs["parent"] == root_parent
         ):  # cell design is html
-            style["type"] = "html"
-            split_values = (
-                re.sub("<hr .*?>", "\n<hr>\n", value).lstrip("\n").split("\n")
-            )
+            cell_result["style"] = FrozenStyle(style, type="html")
             cell_result["values"] = [
-                self._get_text_values(bs(val, "lxml").text)
-                for val in split_values
-                if val != "<hr>"
+                self._get_text_values(text)
+                for text in self.html_label_extractor.extract(value)
             ]
-            cell_result["style"]["type"] = "html"
         else:
             cell_result["values"] = self._get_text_values(value)
 
@@ -193,24 +237,13 @@ class StyleParser(Parser):
 
     def _get_style(self, style_attrs):
         """
-        Convert the style attribute to a dictionary
+        Convert the style attribute to a dictionary, shared by the elements with the same style
 
         Parameters:
           style_attrs: style attributes of the element
 
         Returns:
-          style_dict: style attribute as a dictionary
+          style_dict: style attribute as a read-only dictionary
         """
 
-        style_list = style_attrs.split(";")
-        style_dict = dict()
-
-        for s in style_list:
-            if "=" in s:
-                s_list = s.split("=")
-                style_dict[s_list[0]] = s_list[1]
-            else:
-                if s:
-                    style_dict["type"] = s
-
-        return style_dict
+        return style_cache.get(style_attrs)
@@ -1,5 +1,6 @@
 import traceback
 from parsers.parser import Parser
+from parsers.syntax_tree import SyntaxTree, ClassBuilder, Property, Method, Parameter
 
 
 class SyntaxParser(Parser):
@@ -15,134 +16,156 @@ class SyntaxParser(Parser):
           style_tree: style tree of the drawio file
 
         Returns:
-          syntax_tree: the syntax tree that is used by the generators
+          syntax_tree: the SyntaxTree that is used by the generators
         """
 
         print("<<< CONVERTING STYLE TREE TO SYNTAX TREE >>>")
 
         try:
-            syntax_tree = dict()
             cells = style_tree["root"]["cells"]
             relationships = style_tree["root"]["relationships"]
-            parent = style_tree["root"]["id"]
 
-            propertiesDone = False
-
-            _id = 0
+            self.start(style_tree["root"]["id"])
             for key, value in cells.items():
-                if (
-                    value["parent_id"] in relationships.keys()
-                    or "endArrow" in value["style"].keys()
-                ):
-                    # skip the label for relationships
-                    continue
-
-                if (
-                    value["parent_id"] == parent
-                    and value["style"]["type"].lower() == "swimlane"
-                    or value["style"]["type"].lower() == "html"
-                ):
-                    # start of a new cell
-                    syntax_tree[key] = self._tree_template(value)
-                    propertiesDone = False
-                    _id = 0
-                else:
-                    # properties and methods in the cell
-                    if (
-                        value["style"]["type"].lower() == "line"
-                        and value["parent_id"] in syntax_tree.keys()
-                    ):  # line seperating the properties and methods
-                        propertiesDone = True
-                        _id = 0
-                    else:
-                        if not propertiesDone:  # properties
-                            syntax_tree[value["parent_id"]]["properties"] = {
-                                **syntax_tree[value["parent_id"]]["properties"],
-                                **self._properties_template(value, _id),
-                            }
-                            _id += len(value["values"])
-                        else:  # methods
-                            syntax_tree[value["parent_id"]]["methods"] = {
-                                **syntax_tree[value["parent_id"]]["methods"],
-                                **self._methods_template(value, _id),
-                            }
-                            _id += len(value["values"])
-
-            for relationship in relationships.keys():
-                self._add_relationships(syntax_tree, relationships[relationship])
-
-            return syntax_tree
+                self.add_cell(key, value, relationships)
+
+            return self.finish(relationships.values())
         except Exception as e:
             traceback.print_exc()
             print(f"SyntaxParser.parse ERROR: {e}")
             return False
 
-    def _tree_template(self, main_cell):
+    def start(self, parent):
+        """
+        Start collecting the classes of the cells, which can be added one at a time
+
+        Parameters:
+          parent: id of the root parent element
+        """
+
+        self.parent = parent
+        self.builders = dict()
+        self.properties_done = False
+        self._id = 0
+
+    def add_cell(self, key, value, relationships):
+        """
+        Add a cell of the style tree, in the order of the cells
+
+        Parameters:
+          key: id of the cell
+          value: the cell from the style tree
+          relationships: the relationships of the style tree by id, to skip their labels
         """
-        Create the template that will house each cell
+
+        if (
+            value["parent_id"] in relationships.keys()
+            or "endArrow" in value["style"].keys()
+        ):
+            # skip the label for relationships
+            return
+
+        if (
+            value["parent_id"] == self.parent
+            and value["style"]["type"].lower() == "swimlane"
+            or value["style"]["type"].lower() == "html"
+        ):
+            # start of a new cell
+            self.builders[key] = self._class_builder(key, value)
+            self.properties_done = False
+            self._id = 0
+        else:
+            # properties and methods in the cell
+            if (
+                value["style"]["type"].lower() == "line"
+                and value["parent_id"] in self.builders.keys()
+            ):  # line seperating the properties and methods
+                self.properties_done = True
+                self._id = 0
+            else:
+                builder = self.builders[value["parent_id"]]
+                if not self.properties_done:  # properties
+                    for _property in self._parse_properties(value["values"], self._id):
+                        builder.add_property(_property)
+                else:  # methods
+                    for method in self._parse_methods(
+                        value["values"], value["style"], self._id
+                    ):
+                        builder.add_method(method)
+                self._id += len(value["values"])
+
+    def finish(self, relationships):
+        """
+        Build the classes of the added cells and add the relationships between them
 
         Parameters:
+          relationships: the relationships of the style tree
+
+        Returns:
+          syntax_tree: the SyntaxTree that is used by the generators
+        """
+
+        syntax_tree = SyntaxTree()
+        for builder in self.builders.values():
+            syntax_tree.add_class(builder.build())
+
+        for relationship in relationships:
+            self._add_relationships(syntax_tree, relationship)
+
+        return syntax_tree
+
+    def _class_builder(self, key, main_cell):
+        """
+        Create the builder that will collect the members of each cell
+
+        Parameters:
+          key: id of the cell
           main_cell: the starting, parent cell
 
         Returns:
-          template: the starting template (dictionary)
+          builder: the ClassBuilder of the cell
         """
 
-        template = {
-            "type": "class",
-            "inner": "false",
-            "name": main_cell["values"][0] if len(main_cell["values"]) > 0 else "",
-            "properties": {},
-            "methods": {},
-            "relationships": {
-                "implements": [],
-                "extends": [],
-                "association": [],
-                "aggregationChildren": [],
-                "aggregationParents": [],
-                "compositionChildren": [],
-                "compositionParents": [],
-                "inner": [],
-            },
-        }
+        values = main_cell["values"]
+        name = values[0] if len(values) > 0 else ""
 
         if main_cell["style"]["type"] == "html":
-            values_length = len(main_cell["values"])
-            name = main_cell["values"][0] if values_length > 0 else None
-            properties = {
-                "values": main_cell["values"][1] if values_length > 1 else None
-            }
-            methods = {"values": main_cell["values"][2] if values_length > 2 else None}
-
-            template["name"] = name[0]
-            template["properties"] = (
-                self._properties_template(properties, 0) if not None else []
-            )
-            template["methods"] = self._methods_template(methods, 0) if not None else []
+            # the label has the lines of the name, the properties and the methods
+            name = name[0] if len(name) > 0 else ""
+        builder = ClassBuilder(key, name)
+
+        if main_cell["style"]["type"] == "html":
+            for _property in self._parse_properties(
+                values[1] if len(values) > 1 else [], 0
+            ):
+                builder.add_property(_property)
+            for method in self._parse_methods(
+                values[2] if len(values) > 2 else [], {}, 0
+            ):
+                builder.add_method(method)
 
         if "fontStyle" in main_cell["style"] and main_cell["style"]["fontStyle"] == "2":
             # if the fontStyle is italic, then it is an abstract class
-            template["type"] = "abstract"
-        elif template["name"].lower().startswith("<<interface>>"):
-            template["type"] = "interface"
-            template["name"] = template["name"][13:].strip()
+            builder.type = "abstract"
+        elif builder.name.lower().startswith("<<interface>>"):
+            builder.type = "interface"
+            builder.name = builder.name[13:].strip()
 
-        return template
+        return builder
 
-    def _properties_template(self, property_dict, _id):
+    def _parse_properties(self, values, _id):
         """
-        Create the template for properties
+        Create the properties of a row
 
         Parameters:
-          property_dict: the properties dictionary from the style tree
-          _id: id for the keys in the dictionary
+          values: the property values of the row from the style tree
+          _id: id of the last property before the row
 
         Returns:
-          template: the properties tempate (dictionary)
+          properties: list of the properties
         """
 
-        values = property_dict["values"]
-        template = dict()
+        properties = list()
 
         for val in values:
             if len(val) == 0:
@@ -154,30 +177,31 @@ class SyntaxParser(Parser):
             access_modifier_symbol = val[0]
             temp_val = val[1:].split(":")
 
-            template[_id] = {
-                "access": self._get_access_modifier(access_modifier_symbol),
-                "name": temp_val[0].strip(),
-                "type": temp_val[1].strip(),
-            }
+            properties.append(
+                Property(
+                    id=_id,
+                    access=self._get_access_modifier(access_modifier_symbol),
+                    name=temp_val[0].strip(),
+                    type=temp_val[1].strip(),
+                )
+            )
 
-        return template
+        return properties
 
-    def _methods_template(self, method_dict, _id):
+    def _parse_methods(self, values, styles, _id):
         """
-        Create the template for methods
+        Create the methods of a row
 
         Parameters:
-          method_dict: the methods dictionary from the style tree
-          _id: id for the keys in the dictionary
+          values: the method values of the row from the style tree
+          styles: the style of the row
+          _id: id of the last method before the row
 
         Returns:
-          template: the methods tempate (dictionary)
+          methods: list of the methods
         """
 
-        values = method_dict["values"]
-        styles = method_dict["style"]
-
-        template = dict()
+        methods = list()
 
         for val in values:
             if len(val) == 0:
@@ -195,22 +219,24 @@ class SyntaxParser(Parser):
                 parameters = []
             else:
                 parameters = [
-                    (p.split(":")[0].strip(), p.split(":")[1].strip())
+                    Parameter(
+                        name=p.split(":")[0].strip(), type=p.split(":")[1].strip()
+                    )
                     for p in parameters
                 ]
-                parameters = [{"name": p[0], "type": p[1]} for p in parameters]
 
-            template[_id] = {
-                "access": self._get_access_modifier(access_modifier_symbol),
-                "abstract": "true"
-                if "fontStyle" in styles and styles["fontStyle"] == "2"
-                else "false",
-                "name": val[: val.find("(")].strip(),
-                "parameters": {(i + 1): parameters[i] for i in range(len(parameters))},
-                "return_type": val[val.rfind(":") + 1 :].strip(),
-            }
+            methods.append(
+                Method(
+                    id=_id,
+                    access=self._get_access_modifier(access_modifier_symbol),
+                    abstract="fontStyle" in styles and styles["fontStyle"] == "2",
+                    name=val[: val.find("(")].strip(),
+                    parameters=parameters,
+                    return_type=val[val.rfind(":") + 1 :].strip(),
+                )
+            )
 
-        return template
+        return methods
 
     def _get_access_modifier(self, symbol):
         """
@@ -240,22 +266,19 @@ class SyntaxParser(Parser):
         target = relationship["target"]
         style = relationship["style"]
 
-        source_cell = syntax_tree[source]
-        target_cell = syntax_tree[target]
+        for _id in (source, target):
+            if _id not in syntax_tree:
+                raise KeyError(_id)
 
         if "endArrow" in style.keys() and (
             style["endArrow"].lower() == "block" or style["endArrow"].lower() == "none"
         ):
             if style["endArrow"].lower() == "none" or style["endFill"].lower() == "1":
-                # association
-                source_cell["relationships"]["association"] += [target]
-                target_cell["relationships"]["association"] += [source]
+                syntax_tree.add_relationship("association", source, target)
             elif "dashed" in style.keys() and style["dashed"] == "1":
-                # implements
-                source_cell["relationships"]["implements"] += [target]
+                syntax_tree.add_relationship("implements", source, target)
             else:
-                # extends
-                source_cell["relationships"]["extends"] += [target]
+                syntax_tree.add_relationship("extends", source, target)
         elif (
             "endArrow" in style.keys() and style["endArrow"].lower() == "diamondthin"
         ) or (
@@ -265,16 +288,10 @@ class SyntaxParser(Parser):
             if ("endFill" in style.keys() and style["endFill"] == "1") or (
                 "startFill" in style.keys() and style["startFill"] == "1"
             ):
-                # composition
-                source_cell["relationships"]["compositionChildren"] += [target]
-                target_cell["relationships"]["compositionParents"] += [source]
+                syntax_tree.add_relationship("composition", source, target)
             else:
-                # aggregation
-                source_cell["relationships"]["aggregationChildren"] += [target]
-                target_cell["relationships"]["aggregationParents"] += [source]
+                syntax_tree.add_relationship("aggregation", source, target)
         elif (
             "startArrow" in style.keys() and style["startArrow"].lower() == "circleplus"
         ):
-            # inner class
-            source_cell["relationships"]["inner"] += [target]
-            target_cell["inner"] = "true"
+            syntax_tree.add_relationship("inner", source, target)
@@ -0,0 +1,360 @@
+from dataclasses import dataclass, field, replace
+
+# the relationship kinds, with the class lists they fill on the (source, target) classes
+RELATIONSHIP_KINDS = {
+    "implements": ("implements", None),
+    "extends": ("extends", None),
+    "association": ("association", "association"),
+    "aggregation": ("aggregation_children", "aggregation_parents"),
+    "composition": ("composition_children", "composition_parents"),
+    "inner": ("inner", None),
+}
+# the names of the class lists in the dictionary format
+RELATIONSHIP_KEYS = {
+    "implements": "implements",
+    "extends": "extends",
+    "association": "association",
+    "aggregation_children": "aggregationChildren",
+    "aggregation_parents": "aggregationParents",
+    "composition_children": "compositionChildren",
+    "composition_parents": "compositionParents",
+    "inner": "inner",
+}
+
+
+def _boolean(value):
+    return "true" if value else "false"
+
+
+@dataclass(slots=True)
+class Parameter:
+    """
+    Parameter of a method
+    """
+
+    name: str
+    type: str
+
+    def to_dict(self):
+        return {"name": self.name, "type": self.type}
+
+
+@dataclass(slots=True)
+class Property:
+    """
+    Property of a class, the id is its key in the dictionary format
+    """
+
+    id: int = field(compare=False)
+    access: str
+    name: str
+    type: str
+
+    def to_dict(self):
+        return {"access": self.access, "name": self.name, "type": self.type}
+
+
+@dataclass(slots=True)
+class Method:
+    """
+    Method of a class, the id is its key in the dictionary format
+    """
+
+    id: int = field(compare=False)
+    access: str
+    abstract: bool
+    name: str
+    parameters: list
+    return_type: str
+
+    def to_dict(self):
+        return {
+            "access": self.access,
+            "abstract": _boolean(self.abstract),
+            "name": self.name,
+            "parameters": {
+                i + 1: parameter.to_dict()
+                for i, parameter in enumerate(self.parameters)
+            },
+            "return_type": self.return_type,
+        }
+
+
+@dataclass(slots=True)
+class Relationship:
+    """
+    Relationship of the diagram from the source class to the target class
+    """
+
+    kind: str
+    source: str
+    target: str
+
+
+@dataclass(slots=True)
+class Relationships:
+    """
+    Ids of the related classes of a class, in the order of the diagram relationships
+    """
+
+    implements: list = field(default_factory=list)
+    extends: list = field(default_factory=list)
+    association: list = field(default_factory=list)
+    aggregation_children: list = field(default_factory=list)
+    aggregation_parents: list = field(default_factory=list)
+    composition_children: list = field(default_factory=list)
+    composition_parents: list = field(default_factory=list)
+    inner: list = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            key: list(getattr(self, attribute))
+            for attribute, key in RELATIONSHIP_KEYS.items()
+        }
+
+
+@dataclass(slots=True)
+class Class:
+    """
+    Class, abstract class or interface of the diagram
+    """
+
+    id: str
+    name: str
+    type: str = "class"
+    inner: bool = False
+    properties: list = field(default_factory=list)
+    methods: list = field(default_factory=list)
+    relationships: Relationships = field(default_factory=Relationships)
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "inner": _boolean(self.inner),
+            "name": self.name,
+            "properties": {
+                _property.id: _property.to_dict() for _property in self.properties
+            },
+            "methods": {method.id: method.to_dict() for method in self.methods},
+            "relationships": self.relationships.to_dict(),
+        }
+
+
+class ClassBuilder:
+    """
+    Collect the members of a class while the cells of the diagram are parsed
+    """
+
+    __slots__ = ("id", "name", "type", "properties", "methods")
+
+    def __init__(self, _id, name, type="class"):
+        """
+        Parameters:
+            _id: id of the class cell
+            name: name of the class
+            type: type of the class, class, abstract or interface
+        """
+
+        self.id = _id
+        self.name = name
+        self.type = type
+        # keyed by the member id, a member with the same id replaces the earlier one
+        self.properties = dict()
+        self.methods = dict()
+
+    def add_property(self, _property):
+        self.properties[_property.id] = _property
+
+    def add_method(self, method):
+        self.methods[method.id] = method
+
+    def build(self):
+        """
+        Build the class with the members in the order they were first added
+
+        Returns:
+            _class: the Class
+        """
+
+        return Class(
+            id=self.id,
+            name=self.name,
+            type=self.type,
+            properties=list(self.properties.values()),
+            methods=list(self.methods.values()),
+        )
+
+
+class SyntaxTree:
+    """
+    Classes of the diagram with their relationships, indexed by id, by name and
+    by the target of the relationships
+    """
+
+    __slots__ = ("classes", "names", "relationships", "reverse")
+
+    def __init__(self):
+        self.classes = dict()
+        self.names = dict()
+        self.relationships = list()
+        self.reverse = {kind: dict() for kind in RELATIONSHIP_KINDS}
+
+    def add_class(self, _class):
+        """
+        Add a class to the tree, the first class with a name is the one found by it
+
+        Parameters:
+            _class: the Class to be added
+        """
+
+        self.classes[_class.id] = _class
+        self.names.setdefault(_class.name, _class)
+
+    def add_relationship(self, kind, source, target):
+        """
+        Add a relationship between two classes of the tree
+
+        Parameters:
+            kind: kind of the relationship, see RELATIONSHIP_KINDS
+            source: id of the source class
+            target: id of the target class
+        """
+
+        source_class = self.classes[source]
+        target_class = self.classes[target]
+
+        self.relationships.append(Relationship(kind, source, target))
+        self.reverse[kind].setdefault(target, []).append(source)
+
+        source_list, target_list = RELATIONSHIP_KINDS[kind]
+        getattr(source_class.relationships, source_list).append(target)
+        if target_list:
+            getattr(target_class.relationships, target_list).append(source)
+        if kind == "inner":
+            target_class.inner = True
+
+    def merge(self, other, prefix):
+        """
+        Add the classes and the relationships of another page to the tree
+
+        A class with the name of a class of the pages merged before is the same
+        class, so the relationships drawn on different pages meet. Its members
+        and relationships that are not in the tree yet are added to it.
+
+        Parameters:
+            other: the SyntaxTree of the page
+            prefix: prefix of the ids of the page that are already in the tree
+        """
+
+        previous = dict(self.names)
+        ids = dict()
+        for _id, _class in other.items():
+            existing = previous.get(_class.name) if _class.name else None
+            if existing is not None:
+                self._merge_members(existing, _class)
+                if existing.type == "class":
+                    existing.type = _class.type
+                ids[_id] = existing.id
+                continue
+
+            new_id = _id
+            while new_id in self.classes:
+                new_id = f"{prefix}-{new_id}"
+            self.add_class(
+                Class(
+                    id=new_id,
+                    name=_class.name,
+                    type=_class.type,
+                    properties=list(_class.properties),
+                    methods=list(_class.methods),
+                )
+            )
+            ids[_id] = new_id
+
+        edges = {
+            (relationship.kind, relationship.source, relationship.target)
+            for relationship in self.relationships
+        }
+        for relationship in other.relationships:
+            edge = (
+                relationship.kind,
+                ids[relationship.source],
+                ids[relationship.target],
+            )
+            if edge not in edges:
+                edges.add(edge)
+                self.add_relationship(*edge)
+
+    def _merge_members(self, existing, _class):
+        """
+        Add the members of a class of another page that the class does not have
+
+        Parameters:
+            existing: the Class of the tree
+            _class: the Class with the same name from the other page
+        """
+
+        for members, new_members in (
+            (existing.properties, _class.properties),
+            (existing.methods, _class.methods),
+        ):
+            last_id = max((member.id for member in members), default=0)
+            for member in new_members:
+                if member not in members:
+                    last_id += 1
+                    members.append(replace(member, id=last_id))
+
+    def by_name(self, name):
+        """
+        Get the class with the name
+
+        Parameters:
+            name: name of the class
+
+        Returns:
+            _class: the Class, None if there is no class with the name
+        """
+
+        return self.names.get(name)
+
+    def sources(self, kind, target):
+        """
+        Get the classes with a relationship to the class, like its subclasses
+
+        Parameters:
+            kind: kind of the relationship, see RELATIONSHIP_KINDS
+            target: id of the target class
+
+        Returns:
+            sources: list of the ids of the source classes
+        """
+
+        return self.reverse[kind].get(target, [])
+
+    def to_dict(self):
+        """
+        Convert the tree to the dictionary format of the README
+
+        Returns:
+            syntax_tree: dictionary of the classes by id
+        """
+
+        return {_id: _class.to_dict() for _id, _class in self.classes.items()}
+
+    def __getitem__(self, _id):
+        return self.classes[_id]
+
+    def __contains__(self, _id):
+        return _id in self.classes
+
+    def __iter__(self):
+        return iter(self.classes)
+
+    def __len__(self):
+        return len(self.classes)
+
+    def items(self):
+        return self.classes.items()
+
+    def values(self):
+        return self.classes.values()
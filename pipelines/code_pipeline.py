@@ -0,0 +1,434 @@
+import json
+from decoders.decoder import Decoder, DiagramTooLargeError
+from parsers.style_parser import StyleParser
+from parsers.lxml_style_parser import LxmlStyleParser
+from parsers.style_cache import style_cache
+from parsers.syntax_parser import SyntaxParser
+from parsers.streaming_parser import StreamingParser
+from parsers.syntax_tree import SyntaxTree
+from generators.java_generator import JavaCodeGenerator
+from generators.inheritance import validate_inheritance
+from utilities.cache import cache_key
+from utilities.metrics import metrics
+from utilities.utility import archive_folder, files_to_zip
+
+STYLE_PARSERS = {"bs4": StyleParser, "lxml": LxmlStyleParser}
+# staged decodes, builds the style tree and then the syntax tree, fused streams
+# the diagram straight into the syntax tree with the lxml style parsing
+MODES = ("staged", "fused")
+# the pages of a diagram are merged into one syntax tree, or the code of every
+# page is generated in its own folder of the archive
+PAGES = ("merge", "split")
+
+
+class CodePipeline:
+    """
+    Run the diagram to code pipeline: decode, parse and generate the code archive
+    """
+
+    # bump the version whenever the generated output changes, so cached archives are not reused
+    version = "2"
+
+    def __init__(
+        self,
+        cache=None,
+        style_parser="bs4",
+        mode="staged",
+        limits=None,
+        pages="merge",
+        pool=None,
+        codegen=None,
+        class_cache=None,
+    ):
+        """
+        Parameters:
+            cache: optional ResultCache for the syntax trees and archives
+            style_parser: name of the StyleParser implementation, see STYLE_PARSERS
+            mode: how the diagram is parsed, see MODES
+            limits: optional limits of the Decoder, max_input_bytes, max_xml_bytes and max_pages
+            pages: how the pages of the diagram are generated, see PAGES
+            pool: optional ProcessPool that parses the pages of a diagram in parallel
+            codegen: optional options of the JavaCodeGenerator, workers and min_classes
+              to generate the classes of large diagrams in parallel
+            class_cache: optional ResultCache of the generated classes, by their fingerprint
+        """
+
+        if style_parser not in STYLE_PARSERS:
+            raise ValueError(f"Unknown style parser {style_parser}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown pipeline mode {mode}")
+        if pages not in PAGES:
+            raise ValueError(f"Unknown pages option {pages}")
+
+        self.cache = cache
+        self.limits = limits or dict()
+        self.pool = pool
+        self.codegen = codegen or dict()
+        self.class_cache = class_cache
+        # numbers of the top-level classes of the last run, None if it was not generated
+        self.classes = None
+        self.options = {
+            "language": "java",
+            "style_parser": style_parser,
+            "mode": mode,
+            "pages": pages,
+        }
+
+    def key(self, encoded_xml):
+        """
+        Get the cache key for the diagram
+
+        Parameters:
+            encoded_xml: encoded .drawio file content
+
+        Returns:
+            key: hash of the diagram and the generator options
+        """
+
+        return cache_key(
+            self.version, json.dumps(self.options, sort_keys=True), encoded_xml
+        )
+
+    def run(self, encoded_xml):
+        """
+        Generate the code archive for the diagram, reusing cached results
+
+        Parameters:
+            encoded_xml: encoded .drawio file content
+
+        Returns:
+            syntax_tree: the syntax tree of the diagram, False if unsuccessful
+            archive: the zip archive of the generated code, False if unsuccessful
+            cached: True if the result was taken from the cache
+
+        Raises:
+            DiagramTooLargeError: if the file or the diagram is over the size limits
+            InheritanceCycleError: if classes of the diagram inherit from each other in a cycle
+        """
+
+        self.classes = None
+        key = self.key(encoded_xml) if self.cache else None
+        if key:
+            result = self.cache.get(key)
+            if result:
+                return result["syntax_tree"], result["archive"], True
+
+        syntax_tree, archive = self.generate(encoded_xml)
+        if key and syntax_tree and archive:
+            self.cache.put(key, {"syntax_tree": syntax_tree, "archive": archive})
+
+        return syntax_tree, archive, False
+
+    def run_batch(self, encoded_xmls, pool):
+        """
+        Generate the code archives for many diagrams, generating the uncached ones in parallel
+
+        Parameters:
+            encoded_xmls: list of encoded .drawio file contents
+            pool: ProcessPool for the decoding, parsing and generation
+
+        Returns:
+            results: list of (syntax_tree, archive, cached, error) in the order of the
+                diagrams, error is the exception of a failed generation or None
+        """
+
+        keys = [
+            self.key(encoded_xml) if self.cache else None
+            for encoded_xml in encoded_xmls
+        ]
+
+        results = [None] * len(encoded_xmls)
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key) if key else None
+            if cached:
+                results[i] = (cached["syntax_tree"], cached["archive"], True, None)
+
+        # identical diagrams in the batch are generated once
+        pending = dict()
+        for i, result in enumerate(results):
+            if result is None:
+                pending.setdefault(encoded_xmls[i], []).append(i)
+
+        generated = pool.map(
+            generate_archive,
+            list(pending.keys()),
+            [self.options["style_parser"]] * len(pending),
+            [self.options["mode"]] * len(pending),
+            [self.limits] * len(pending),
+            [self.options["pages"]] * len(pending),
+        )
+
+        for indexes, (result, error) in zip(pending.values(), generated):
+            if error is not None:
+                print(f"CodePipeline.run_batch ERROR: {error}")
+                result = (False, False)
+
+            syntax_tree, archive = result
+            if keys[indexes[0]] and syntax_tree and archive:
+                self.cache.put(
+                    keys[indexes[0]], {"syntax_tree": syntax_tree, "archive": archive}
+                )
+            for i in indexes:
+                results[i] = (syntax_tree, archive, False, error)
+
+        return results
+
+    def generate(self, encoded_xml):
+        """
+        Generate the code archive for the diagram
+
+        Parameters:
+            encoded_xml: encoded .drawio file content
+
+        Returns:
+            syntax_tree: the syntax tree of all the pages of the diagram, False if unsuccessful
+            archive: the zip archive of the generated code, False if unsuccessful
+
+        Raises:
+            DiagramTooLargeError: if the file or the diagram is over the size limits
+            InheritanceCycleError: if classes of the diagram inherit from each other in a cycle
+        """
+
+        pages = metrics.measure("pages", Decoder(**self.limits).pages, encoded_xml)
+        if not pages:
+            return False, False
+
+        parsed = self.parse_pages(pages)
+        style_cache.report()
+        if not parsed:
+            return False, False
+
+        page_trees = [syntax_tree for syntax_tree, _, _ in parsed]
+        if len(page_trees) == 1:
+            syntax_tree = page_trees[0]
+        else:
+            syntax_tree = metrics.measure("merge", self.merge, pages, page_trees)
+        if not syntax_tree:
+            return False, False
+
+        metrics.gauge("generator_diagram_pages", len(pages))
+        metrics.gauge("generator_diagram_cells", sum(p[1] for p in parsed))
+        metrics.gauge("generator_diagram_relationships", sum(p[2] for p in parsed))
+        metrics.gauge("generator_diagram_classes", len(syntax_tree))
+
+        generated_trees = (
+            page_trees if self.options["pages"] == "split" else [syntax_tree]
+        )
+        for generated_tree in generated_trees:
+            metrics.measure("validate", validate_inheritance, generated_tree)
+
+        self.classes = {"regenerated": 0, "reused": 0}
+        if self.options["pages"] == "split":
+            code = metrics.measure("generate", self.generate_pages, pages, page_trees)
+        else:
+            code = metrics.measure("generate", self.generate_sources, syntax_tree)
+        if not code:
+            return False, False
+
+        for result, count in self.classes.items():
+            if count:
+                metrics.inc("generator_classes_total", count, result=result)
+
+        archive = metrics.measure("archive", files_to_zip, code)
+        return syntax_tree, archive.getvalue()
+
+    def parse_pages(self, pages):
+        """
+        Parse the pages of the diagram, in parallel on the pool if there are many
+
+        Parameters:
+            pages: the pages of the diagram from the Decoder
+
+        Returns:
+            parsed: list of the parsed pages, see parse_page, False if a page failed
+
+        Raises:
+            DiagramTooLargeError: if a page is over the size limit
+        """
+
+        if self.pool is None or len(pages) == 1:
+            parsed = [self.parse_page(page) for page in pages]
+        else:
+            parsed = list()
+            for result, error in self.pool.map(
+                parse_diagram_page,
+                pages,
+                [self.options["style_parser"]] * len(pages),
+                [self.options["mode"]] * len(pages),
+                [self.limits] * len(pages),
+            ):
+                if isinstance(error, DiagramTooLargeError):
+                    raise error
+                if error is not None:
+                    print(f"CodePipeline.parse_pages ERROR: {error}")
+                    return False
+                parsed.append(result)
+
+        if not all(parsed):
+            return False
+        return parsed
+
+    def parse_page(self, page):
+        """
+        Parse a page of the diagram, with the separate stages or fused
+
+        Parameters:
+            page: the page of the diagram from the Decoder
+
+        Returns:
+            parsed: the syntax tree with the numbers of cells and relationships, False if unsuccessful
+        """
+
+        if self.options["mode"] == "fused":
+            parser = StreamingParser(decoder=Decoder(**self.limits))
+            syntax_tree = metrics.measure("fused_parse", parser.parse_page, page)
+            if syntax_tree is False:
+                return False
+
+            return syntax_tree, parser.cells, parser.relationships
+
+        decoded_xml = metrics.measure(
+            "decode", Decoder(**self.limits).convert_page, page
+        )
+        if not decoded_xml:
+            return False
+
+        style_parser = STYLE_PARSERS[self.options["style_parser"]]()
+        style_tree = metrics.measure("style_parse", style_parser.parse, decoded_xml)
+        if not style_tree:
+            return False
+
+        syntax_tree = metrics.measure("syntax_parse", SyntaxParser().parse, style_tree)
+        if syntax_tree is False:
+            return False
+
+        return (
+            syntax_tree,
+            len(style_tree["root"]["cells"]),
+            len(style_tree["root"]["relationships"]),
+        )
+
+    def merge(self, pages, page_trees):
+        """
+        Merge the syntax trees of the pages, the classes with the same name are one class
+
+        Parameters:
+            pages: the pages of the diagram from the Decoder
+            page_trees: the syntax trees of the pages
+
+        Returns:
+            syntax_tree: the syntax tree of all the pages
+        """
+
+        syntax_tree = SyntaxTree()
+        for i, (page, page_tree) in enumerate(zip(pages, page_trees)):
+            syntax_tree.merge(page_tree, page["id"] or str(i + 1))
+
+        return syntax_tree
+
+    def generate_sources(self, syntax_tree):
+        """
+        Generate the code of the syntax tree, counting the regenerated and the reused classes
+
+        Parameters:
+            syntax_tree: the syntax tree to be generated
+
+        Returns:
+            files: list of [file_name, file_contents] pairs, False if unsuccessful
+        """
+
+        generator = JavaCodeGenerator(**self.codegen, cache=self.class_cache)
+        files = generator.generate_sources(syntax_tree)
+        if files is not False:
+            for result, count in generator.classes.items():
+                self.classes[result] += count
+
+        return files
+
+    def class_counts(self, syntax_tree):
+        """
+        Get the numbers of the regenerated and the reused classes of the last run,
+        all the classes are reused if the code was cached or generated for another request
+
+        Parameters:
+            syntax_tree: the syntax tree of the result
+
+        Returns:
+            classes: dictionary of the numbers of the regenerated and the reused classes
+        """
+
+        if self.classes is not None:
+            return self.classes
+
+        top_level = sum(1 for _class in syntax_tree.values() if not _class.inner)
+        return {"regenerated": 0, "reused": top_level}
+
+    def generate_pages(self, pages, page_trees):
+        """
+        Generate the code of every page in a folder named after the page
+
+        Parameters:
+            pages: the pages of the diagram from the Decoder
+            page_trees: the syntax trees of the pages
+
+        Returns:
+            files: list of [file_name, file_contents] pairs, False if unsuccessful
+        """
+
+        files, folders = list(), set()
+        for i, (page, page_tree) in enumerate(zip(pages, page_trees)):
+            folder = archive_folder(folders, [page["name"], f"Page-{i + 1}"], i + 1)
+
+            page_files = self.generate_sources(page_tree)
+            if page_files is False:
+                return False
+            files += [[f"{folder}/{name}", contents] for name, contents in page_files]
+
+        return files
+
+
+def parse_diagram_page(page, style_parser="bs4", mode="staged", limits=None):
+    """
+    Parse a page of the diagram in a pool process
+
+    Parameters:
+        page: the page of the diagram from the Decoder
+        style_parser: name of the StyleParser implementation
+        mode: how the diagram is parsed
+        limits: optional size limits of the Decoder
+
+    Returns:
+        parsed: the syntax tree with the numbers of cells and relationships, False if unsuccessful
+    """
+
+    result = CodePipeline(
+        style_parser=style_parser, mode=mode, limits=limits
+    ).parse_page(page)
+    style_cache.report()
+    metrics.flush()
+    return result
+
+
+def generate_archive(
+    encoded_xml, style_parser="bs4", mode="staged", limits=None, pages="merge"
+):
+    """
+    Generate the code archive for the diagram in a pool process
+
+    Parameters:
+        encoded_xml: encoded .drawio file content
+        style_parser: name of the StyleParser implementation
+        mode: how the diagram is parsed
+        limits: optional size limits of the Decoder
+        pages: how the pages of the diagram are generated
+
+    Returns:
+        syntax_tree: the syntax tree of the diagram, False if unsuccessful
+        archive: the zip archive of the generated code, False if unsuccessful
+    """
+
+    result = CodePipeline(
+        style_parser=style_parser, mode=mode, limits=limits, pages=pages
+    ).generate(encoded_xml)
+    metrics.flush()
+    return result
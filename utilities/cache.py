@@ -0,0 +1,233 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+import traceback
+from collections import OrderedDict
+from utilities.metrics import metrics
+
+
+def cache_key(*parts):
+    """
+    Build a content-addressed cache key
+
+    Parameters:
+        parts: strings or bytes that identify the cached content
+
+    Returns:
+        key: hex digest of the parts
+    """
+
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf8"))
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with byte-size eviction and an optional on-disk tier
+    """
+
+    def __init__(self, name, max_bytes, directory=None, max_disk_bytes=None):
+        """
+        Parameters:
+            name: name of the cache in the metrics
+            max_bytes: maximum size of the in-memory tier in bytes
+            directory: directory of the on-disk tier, None to disable it
+            max_disk_bytes: maximum size of the on-disk tier in bytes, None for no limit
+        """
+
+        self.name = name
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key):
+        """
+        Get a value from the cache
+
+        Parameters:
+            key: the cache key
+
+        Returns:
+            value: the cached value, None if it is not cached
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+
+        if entry is not None:
+            metrics.inc("generator_cache_requests_total", cache=self.name, result="hit")
+            return entry[0]
+
+        blob = self._read_disk(key)
+        if blob is None:
+            with self.lock:
+                self.misses += 1
+            metrics.inc(
+                "generator_cache_requests_total", cache=self.name, result="miss"
+            )
+            return None
+
+        value = pickle.loads(blob)
+        with self.lock:
+            self.hits += 1
+            self.disk_hits += 1
+        metrics.inc(
+            "generator_cache_requests_total", cache=self.name, result="disk_hit"
+        )
+        self._put_memory(key, value, len(blob))
+        return value
+
+    def put(self, key, value):
+        """
+        Put a value into the cache
+
+        Parameters:
+            key: the cache key
+            value: picklable value to be cached
+        """
+
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._put_memory(key, value, len(blob))
+        self._write_disk(key, blob)
+
+    def stats(self):
+        """
+        Get the cache counters
+
+        Returns:
+            stats: dictionary of the cache counters
+        """
+
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.size,
+            }
+
+    def _put_memory(self, key, value, size):
+        """
+        Put a value into the in-memory tier, evicting the least recently used entries
+
+        Parameters:
+            key: the cache key
+            value: value to be cached
+            size: size of the value in bytes
+        """
+
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+
+            self.entries[key] = (value, size)
+            self.size += size
+
+            evicted = 0
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+                evicted += 1
+            self.evictions += evicted
+            size = self.size
+
+        if evicted:
+            metrics.inc("generator_cache_evictions_total", evicted, cache=self.name)
+        metrics.gauge("generator_cache_bytes", size, cache=self.name)
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def _read_disk(self, key):
+        """
+        Read a pickled value from the on-disk tier
+
+        Parameters:
+            key: the cache key
+
+        Returns:
+            blob: the pickled value, None if it is not cached
+        """
+
+        if not self.directory:
+            return None
+
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                blob = f.read()
+            os.utime(self._disk_path(key))
+            return blob
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key, blob):
+        """
+        Write a pickled value to the on-disk tier, removing the oldest entries over the limit
+
+        Parameters:
+            key: the cache key
+            blob: the pickled value
+        """
+
+        if not self.directory:
+            return
+
+        try:
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, suffix=".tmp", delete=False
+            ) as f:
+                f.write(blob)
+            os.replace(f.name, self._disk_path(key))
+
+            if self.max_disk_bytes is not None:
+                self._trim_disk()
+        except Exception as e:
+            traceback.print_exc()
+            print(f"ResultCache._write_disk ERROR: {e}")
+
+    def _trim_disk(self):
+        """
+        Remove the least recently used entries from the on-disk tier
+        """
+
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".pickle"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        disk_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if disk_size <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            disk_size -= size
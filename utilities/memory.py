@@ -0,0 +1,116 @@
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+class MemoryTracker:
+    """
+    Per stage tracemalloc measurements for the requests that opt in.
+
+    tracemalloc is global to the process, so concurrent requests of the same
+    worker show up in each other's measurements; it is meant for debugging.
+    """
+
+    def __init__(self, top=10, frames=1):
+        """
+        Parameters:
+            top: number of allocation sites reported per stage
+            frames: number of frames stored per allocation
+        """
+
+        self.top = top
+        self.frames = frames
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.active = 0
+
+    def begin(self):
+        """
+        Start measuring the stages of the current thread
+        """
+
+        with self.lock:
+            if self.active == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            self.active += 1
+
+        self.local.stages = []
+        self.local.stack = []
+
+    def end(self):
+        """
+        Stop measuring the stages of the current thread
+
+        Returns:
+            stages: list of the stage measurements
+        """
+
+        stages = self.local.stages
+        self.local.stages = None
+        self.local.stack = None
+
+        with self.lock:
+            self.active -= 1
+            if self.active == 0:
+                tracemalloc.stop()
+
+        return stages
+
+    @contextmanager
+    def track(self, stage):
+        """
+        Measure the peak and retained memory and the top allocation sites of a stage
+
+        Parameters:
+            stage: the name of the stage
+        """
+
+        stages = getattr(self.local, "stages", None)
+        if stages is None or not tracemalloc.is_tracing():
+            yield
+            return
+
+        stack = self.local.stack
+        before = self._snapshot()
+        current_before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        frame = {"peak": current_before}
+        stack.append(frame)
+
+        try:
+            yield
+        finally:
+            stack.pop()
+            current_after, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame["peak"])
+            if stack:
+                # the peak of the outer stage was reset by this stage
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+
+            after = self._snapshot()
+            stages.append(
+                {
+                    "stage": stage,
+                    "peak_bytes": peak - current_before,
+                    "retained_bytes": current_after - current_before,
+                    "top": [
+                        {
+                            "site": str(stat.traceback),
+                            "size_diff": stat.size_diff,
+                            "count_diff": stat.count_diff,
+                        }
+                        for stat in after.compare_to(before, "lineno")[: self.top]
+                    ],
+                }
+            )
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+
+
+memory_tracker = MemoryTracker()
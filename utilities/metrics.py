@@ -0,0 +1,521 @@
+import os
+import json
+import time
+import fcntl
+import bisect
+import tempfile
+import threading
+import traceback
+from contextlib import contextmanager
+from functools import wraps
+from utilities.memory import memory_tracker
+
+# upper bounds of the histogram buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# name: (type, help, aggregation of the gauge over the workers)
+DEFINITIONS = {
+    "generator_stage_duration_seconds": (
+        "histogram",
+        "Duration of the code generation pipeline stages",
+        None,
+    ),
+    "generator_stage_errors_total": (
+        "counter",
+        "Failures of the code generation pipeline stages",
+        None,
+    ),
+    "generator_repository_duration_seconds": (
+        "histogram",
+        "Duration of the repository calls",
+        None,
+    ),
+    "generator_repository_errors_total": (
+        "counter",
+        "Failures of the repository calls",
+        None,
+    ),
+    "generator_diagram_cells": (
+        "gauge",
+        "Number of cells in the last parsed diagram",
+        "latest",
+    ),
+    "generator_diagram_classes": (
+        "gauge",
+        "Number of classes in the last parsed diagram",
+        "latest",
+    ),
+    "generator_diagram_relationships": (
+        "gauge",
+        "Number of relationships in the last parsed diagram",
+        "latest",
+    ),
+    "generator_diagram_pages": (
+        "gauge",
+        "Number of pages in the last parsed diagram",
+        "latest",
+    ),
+    "generator_query_rows": (
+        "gauge",
+        "Number of rows returned by the last document or graph query",
+        "latest",
+    ),
+    "generator_cache_requests_total": (
+        "counter",
+        "Cache lookups by result",
+        None,
+    ),
+    "generator_classes_total": (
+        "counter",
+        "Generated top-level classes, regenerated or reused from the class cache",
+        None,
+    ),
+    "generator_cache_evictions_total": (
+        "counter",
+        "Entries evicted from the in-memory cache tier",
+        None,
+    ),
+    "generator_cache_bytes": (
+        "gauge",
+        "Size of the in-memory cache tier in bytes",
+        "sum",
+    ),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _alive(pid):
+    """
+    Check if a process is running, a process of another user counts as running
+    """
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _values(counters, histograms, gauges):
+    """
+    Convert the metric dictionaries to the lists of a metrics file
+
+    Parameters:
+        counters: dictionary of the values by (name, labels)
+        histograms: dictionary of the bucket counts and sum by (name, labels)
+        gauges: dictionary of the (value, timestamp) by (name, labels)
+
+    Returns:
+        values: dictionary of the counters, histograms and gauges lists
+    """
+
+    return {
+        "counters": [
+            [name, labels, value] for (name, labels), value in counters.items()
+        ],
+        "histograms": [
+            [name, labels, list(histogram)]
+            for (name, labels), histogram in histograms.items()
+        ],
+        "gauges": [
+            [name, labels, value, timestamp]
+            for (name, labels), (value, timestamp) in gauges.items()
+        ],
+    }
+
+
+def _aggregate(paths):
+    """
+    Aggregate the values of metrics files, the missing or partly written files are skipped
+
+    Parameters:
+        paths: paths of the metrics files
+
+    Returns:
+        counters: dictionary of the values by (name, labels)
+        histograms: dictionary of the bucket counts and sum by (name, labels)
+        gauges: dictionary of the (value, timestamp) by (name, labels)
+    """
+
+    counters, histograms, gauges = dict(), dict(), dict()
+    for path in paths:
+        try:
+            with open(path) as f:
+                values = json.load(f)
+        except (FileNotFoundError, ValueError):
+            continue
+
+        for name, labels, value in values["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+
+        for name, labels, histogram in values["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.get(key, [0] * len(histogram))
+            histograms[key] = [a + b for a, b in zip(total, histogram)]
+
+        for name, labels, value, timestamp in values["gauges"]:
+            key = (name, tuple(map(tuple, labels)))
+            if DEFINITIONS[name][2] == "sum":
+                total = gauges.get(key, (0, timestamp))[0]
+                gauges[key] = (total + value, timestamp)
+            elif key not in gauges or gauges[key][1] < timestamp:
+                gauges[key] = (value, timestamp)
+
+    return counters, histograms, gauges
+
+
+class Metrics:
+    """
+    Prometheus metrics of the service.
+
+    Every process keeps its own values and writes them to a file of its pid in the
+    metrics directory, so the values of all gunicorn workers and pool processes
+    are aggregated when the metrics are rendered by any of the workers. The files
+    of the processes that exited are folded into a single file when rendering.
+    Until the directory is configured, the values are kept in the process only.
+    """
+
+    # file of the counters and histograms of the processes that exited
+    exited_file = "exited.json"
+
+    # maximum seconds between two writes of the values of the process
+    flush_interval = 5
+
+    def __init__(self, directory=None):
+        """
+        Parameters:
+            directory: directory shared by the processes for their metric values, None to configure it later
+        """
+
+        self.directory = None
+        self.lock = threading.Lock()
+        # pid of the process that last wrote its file
+        self.flushed_pid = None
+        self._reset()
+
+        if directory:
+            self.configure(directory)
+        os.register_at_fork(after_in_child=self._reset)
+
+    def configure(self, directory):
+        """
+        Set the directory of the metric values, before the processes that share it are started
+
+        Parameters:
+            directory: directory shared by the processes for their metric values
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def _reset(self):
+        """
+        Forget the values, a forked process starts its own values
+        """
+
+        self.lock = threading.Lock()
+        self.counters = dict()
+        self.histograms = dict()
+        self.gauges = dict()
+        self.last_flush = time.monotonic()
+
+    def inc(self, name, value=1, **labels):
+        """
+        Increment a counter
+
+        Parameters:
+            name: the name of the counter
+            value: the increment
+            labels: the labels of the counter
+        """
+
+        key = (name, _labels_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        self._flush_if_due()
+
+    def observe(self, name, value, **labels):
+        """
+        Observe a value of a histogram
+
+        Parameters:
+            name: the name of the histogram
+            value: the observed value
+            labels: the labels of the histogram
+        """
+
+        key = (name, _labels_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(BUCKETS) + 2)
+            histogram[bisect.bisect_left(BUCKETS, value)] += 1
+            histogram[-1] += value
+        self._flush_if_due()
+
+    def gauge(self, name, value, **labels):
+        """
+        Set a gauge
+
+        Parameters:
+            name: the name of the gauge
+            value: the value of the gauge
+            labels: the labels of the gauge
+        """
+
+        key = (name, _labels_key(labels))
+        with self.lock:
+            self.gauges[key] = (value, time.time())
+        self._flush_if_due()
+
+    def measure(self, stage, fn, *args, **kwargs):
+        """
+        Run a pipeline stage, recording its duration, failure and memory when tracked
+
+        Parameters:
+            stage: the name of the stage
+            fn: the function of the stage, it fails by raising or returning False
+            args: the arguments of the function
+            kwargs: the keyword arguments of the function
+
+        Returns:
+            result: the result of the function
+        """
+
+        with memory_tracker.track(stage):
+            return self._measure(
+                "generator_stage_duration_seconds",
+                "generator_stage_errors_total",
+                {"stage": stage},
+                fn,
+                args,
+                kwargs,
+            )
+
+    def timed(self, call):
+        """
+        Decorate a repository method, recording its duration and failure
+
+        Parameters:
+            call: the name of the repository call
+        """
+
+        def decorator(fn):
+            @wraps(fn)
+            def decorated(*args, **kwargs):
+                return self._measure(
+                    "generator_repository_duration_seconds",
+                    "generator_repository_errors_total",
+                    {"call": call},
+                    fn,
+                    args,
+                    kwargs,
+                )
+
+            return decorated
+
+        return decorator
+
+    def _measure(self, histogram, errors, labels, fn, args, kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.inc(errors, **labels)
+            raise
+        finally:
+            self.observe(histogram, time.perf_counter() - start, **labels)
+
+        if result is False:
+            self.inc(errors, **labels)
+
+        return result
+
+    def _flush_if_due(self):
+        if time.monotonic() - self.last_flush > self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the values of the process to its file in the metrics directory
+        """
+
+        with self.lock:
+            self.last_flush = time.monotonic()
+            values = _values(self.counters, self.histograms, self.gauges)
+
+        if not self.directory or not any(values.values()):
+            return
+
+        try:
+            pid = os.getpid()
+            if self.flushed_pid != pid:
+                # a file of the pid is left by an exited process that had the same pid
+                path = os.path.join(self.directory, f"{pid}.json")
+                if os.path.exists(path):
+                    with self._exited_lock():
+                        self._fold([path])
+                self.flushed_pid = pid
+
+            self._write(f"{pid}.json", values)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"Metrics.flush ERROR: {e}")
+
+    def _write(self, file_name, values):
+        """
+        Replace a file of the metrics directory with the values
+
+        Parameters:
+            file_name: name of the file in the metrics directory
+            values: dictionary of the counters, histograms and gauges lists
+        """
+
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(values, f)
+        os.replace(f.name, os.path.join(self.directory, file_name))
+
+    @contextmanager
+    def _exited_lock(self):
+        """
+        Hold the lock of the exited file, shared by the processes
+        """
+
+        lock_path = os.path.join(self.directory, "exited.lock")
+        with open(lock_path, "a+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _prune(self):
+        """
+        Fold the files of the processes that exited into the exited file, so the
+        counters and histograms keep their totals without a file for every pid
+        that ever ran
+        """
+
+        with self._exited_lock():
+            exited = list()
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    pid = entry.name[: -len(".json")]
+                    if entry.name.endswith(".json") and pid.isdigit():
+                        if not _alive(int(pid)):
+                            exited.append(entry.path)
+            self._fold(exited)
+
+    def _fold(self, paths):
+        """
+        Add the values of the files of exited processes to the exited file and
+        remove them, the gauges summed over the processes are dropped with them.
+        The lock of the exited file must be held.
+
+        Parameters:
+            paths: paths of the files of the exited processes
+        """
+
+        if not paths:
+            return
+
+        exited_path = os.path.join(self.directory, self.exited_file)
+        counters, histograms, gauges = _aggregate([exited_path] + paths)
+        gauges = {
+            key: gauge
+            for key, gauge in gauges.items()
+            if DEFINITIONS[key[0]][2] != "sum"
+        }
+        self._write(self.exited_file, _values(counters, histograms, gauges))
+        for path in paths:
+            os.remove(path)
+
+    def render(self):
+        """
+        Render the metrics of all processes in the Prometheus text format
+
+        Returns:
+            text: the metrics in the Prometheus text format
+        """
+
+        if self.directory:
+            self.flush()
+            try:
+                self._prune()
+            except Exception as e:
+                traceback.print_exc()
+                print(f"Metrics._prune ERROR: {e}")
+
+            with os.scandir(self.directory) as it:
+                paths = [entry.path for entry in it if entry.name.endswith(".json")]
+            counters, histograms, gauges = _aggregate(paths)
+        else:
+            with self.lock:
+                counters = dict(self.counters)
+                histograms = {key: list(h) for key, h in self.histograms.items()}
+                gauges = dict(self.gauges)
+
+        lines = []
+        for name, (type_, help_, _) in DEFINITIONS.items():
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {type_}")
+
+            if type_ == "counter":
+                for (n, labels), value in sorted(counters.items()):
+                    if n == name:
+                        lines.append(
+                            f"{name}{_format_labels(labels)} {_format_value(value)}"
+                        )
+            elif type_ == "gauge":
+                for (n, labels), (value, _) in sorted(gauges.items()):
+                    if n == name:
+                        lines.append(
+                            f"{name}{_format_labels(labels)} {_format_value(value)}"
+                        )
+            else:
+                for (n, labels), histogram in sorted(histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + (float("inf"),), histogram):
+                        cumulative += count
+                        le = _format_value(float(bound))
+                        lines.append(
+                            f"{name}_bucket{_format_labels(labels, le=le)} {cumulative}"
+                        )
+                    lines.append(
+                        f"{name}_sum{_format_labels(labels)} {_format_value(histogram[-1])}"
+                    )
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+
+# configured by the app with the METRICS_DIR setting
+metrics = Metrics()
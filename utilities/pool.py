@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ProcessPool:
+    """
+    Process pool of the worker for CPU-bound work.
+
+    The executor is created on first use, so it is started after gunicorn forks
+    the worker, and it is replaced when a child process dies.
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Parameters:
+            max_workers: number of processes, None for the number of CPUs
+        """
+
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        with self.lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def map(self, fn, *iterables):
+        """
+        Run the function over the iterables in the pool, keeping the order of the inputs
+
+        Parameters:
+            fn: picklable top-level function
+            iterables: arguments for the function
+
+        Returns:
+            results: list of (result, error) pairs, error is None if successful
+        """
+
+        executor = self.executor
+        futures = [executor.submit(fn, *args) for args in zip(*iterables)]
+
+        results = []
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except BrokenProcessPool as e:
+                self._reset(executor)
+                results.append((None, e))
+            except Exception as e:
+                results.append((None, e))
+
+        return results
+
+    def _reset(self, executor):
+        """
+        Drop a broken executor, so the next call starts a new one
+
+        Parameters:
+            executor: the broken executor
+        """
+
+        with self.lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
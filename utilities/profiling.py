@@ -0,0 +1,195 @@
+import io
+import os
+import re
+import json
+import hmac
+import pstats
+import random
+import cProfile
+import traceback
+from uuid import uuid4
+from functools import wraps
+from flask import request, make_response
+from utilities.memory import memory_tracker
+
+
+class Profiler:
+    """
+    Opt-in CPU and memory profiling of the request handlers.
+
+    A request is CPU profiled when it carries the admin token in the X-Profile header,
+    or when it is picked by the sampling rate. The memory of its pipeline stages is
+    measured when it carries the admin token in the X-Memory-Profile header, or for
+    every request in the memory debug mode. The profiles are stored in the profile
+    directory under the returned X-Profile-Id. When neither a token, a sampling rate
+    nor the memory debug mode is configured, the handlers are not wrapped at all.
+    """
+
+    profile_id_pattern = re.compile("^[0-9a-f]{32}$")
+
+    def __init__(
+        self,
+        directory,
+        token=None,
+        sample_rate=0.0,
+        memory_debug=False,
+        max_profiles=100,
+    ):
+        """
+        Parameters:
+            directory: directory for the stored profiles
+            token: admin token that enables profiling of a request, None to disable
+            sample_rate: fraction of the requests that are CPU profiled
+            memory_debug: measure the memory of the stages of every request
+            max_profiles: number of the most recent profiles that are kept
+        """
+
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.memory_debug = memory_debug
+        self.max_profiles = max_profiles
+
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return bool(self.token) or self.sample_rate > 0 or self.memory_debug
+
+    def is_admin(self, header):
+        """
+        Check the admin token of the request
+
+        Parameters:
+            header: name of the header carrying the token
+
+        Returns:
+            boolean: True if the request carries the admin token
+        """
+
+        value = request.headers.get(header)
+        return bool(self.token and value) and hmac.compare_digest(value, self.token)
+
+    def profiled(self, view):
+        """
+        Decorate a request handler, profiling the requests that opt in
+
+        Parameters:
+            view: the request handler
+        """
+
+        if not self.enabled:
+            return view
+
+        @wraps(view)
+        def decorated(*args, **kwargs):
+            cpu = self.is_admin("X-Profile") or (
+                self.sample_rate > 0 and random.random() < self.sample_rate
+            )
+            memory = self.memory_debug or self.is_admin("X-Memory-Profile")
+            if not cpu and not memory:
+                return view(*args, **kwargs)
+
+            profile = cProfile.Profile() if cpu else None
+            if memory:
+                memory_tracker.begin()
+            try:
+                if profile:
+                    response = profile.runcall(view, *args, **kwargs)
+                else:
+                    response = view(*args, **kwargs)
+            finally:
+                stages = memory_tracker.end() if memory else None
+            response = make_response(response)
+
+            profile_id = uuid4().hex
+            if profile:
+                self._save(profile_id, "pstats", profile.dump_stats)
+            if memory:
+                self._save(
+                    profile_id,
+                    "memory.json",
+                    lambda path: self._dump_json(path, stages),
+                )
+                response.headers["X-Memory-Profile"] = ", ".join(
+                    f"{s['stage']};peak={s['peak_bytes']};retained={s['retained_bytes']}"
+                    for s in stages
+                )
+            response.headers["X-Profile-Id"] = profile_id
+            return response
+
+        return decorated
+
+    def path(self, profile_id, extension="pstats"):
+        """
+        Get the path of a stored profile
+
+        Parameters:
+            profile_id: the id of the profile
+            extension: the extension of the profile file
+
+        Returns:
+            path: path of the profile file, None if the id is not valid or not stored
+        """
+
+        if not self.profile_id_pattern.match(profile_id):
+            return None
+
+        path = os.path.join(self.directory, f"{profile_id}.{extension}")
+        return path if os.path.exists(path) else None
+
+    def summary(self, path, limit=50):
+        """
+        Format a stored profile as text
+
+        Parameters:
+            path: path of the profile file
+            limit: number of functions in the summary
+
+        Returns:
+            text: the functions sorted by cumulative time
+        """
+
+        text = io.StringIO()
+        pstats.Stats(path, stream=text).sort_stats("cumulative").print_stats(limit)
+        return text.getvalue()
+
+    def _save(self, profile_id, extension, dump):
+        """
+        Store a profile, removing the oldest profiles over the limit
+
+        Parameters:
+            profile_id: the id of the profile
+            extension: the extension of the profile file
+            dump: function writing the profile to the given path
+        """
+
+        try:
+            dump(os.path.join(self.directory, f"{profile_id}.{extension}"))
+            self._trim()
+        except Exception as e:
+            traceback.print_exc()
+            print(f"Profiler._save ERROR: {e}")
+
+    def _dump_json(self, path, data):
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def _trim(self):
+        """
+        Remove the oldest profiles over the limit
+        """
+
+        with os.scandir(self.directory) as it:
+            profiles = sorted(
+                (entry.stat().st_mtime, entry.path)
+                for entry in it
+                if not entry.name.endswith(".tmp")
+            )
+
+        for _, path in profiles[: max(len(profiles) - self.max_profiles, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
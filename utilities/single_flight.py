@@ -0,0 +1,326 @@
+import os
+import time
+import fcntl
+import pickle
+import tempfile
+import threading
+import traceback
+
+
+def _same_file(open_file, path):
+    """
+    Check that an open file is still the file at the path
+
+    Parameters:
+        open_file: the open file
+        path: path of the file
+
+    Returns:
+        same: False if the file at the path was removed or replaced
+    """
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+
+    open_stat = os.fstat(open_file.fileno())
+    return (stat.st_dev, stat.st_ino) == (open_stat.st_dev, open_stat.st_ino)
+
+
+class IdempotencyConflictError(Exception):
+    """
+    The key of a computation was used again with other inputs, like the
+    Idempotency-Key of a client sent with another request
+    """
+
+
+class _Call:
+    """
+    In-flight or recently finished computation shared by the callers of the same key
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.expires = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations of the same key into a single one.
+
+    Callers within a worker wait on the in-flight computation of the key. When a
+    directory is given, the leader of a key across the workers holds the lock file
+    of that key while it computes. The followers in other workers mark that they
+    are waiting and block on the lock, and the leader shares its result through
+    the directory only when a follower is waiting or the result is kept for a ttl.
+    """
+
+    sweep_interval = 60
+
+    def __init__(self, directory=None, share_window=5):
+        """
+        Parameters:
+            directory: directory shared by the workers, None to coalesce within the worker only
+            share_window: seconds a finished result is kept for the followers in other workers
+        """
+
+        self.directory = directory
+        self.share_window = share_window
+        self.calls = dict()
+        self.lock = threading.Lock()
+        self.last_sweep = 0
+
+        self.leaders = 0
+        self.followers = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def do(self, key, fn, ttl=0, inputs=None):
+        """
+        Run the computation of the key once and share its result
+
+        Parameters:
+            key: key identifying the computation
+            fn: function without arguments that computes the result
+            ttl: seconds the result is kept after it is computed, e.g. for idempotency keys
+            inputs: hash of the inputs when the key does not identify them, e.g. for idempotency keys
+
+        Returns:
+            result: the result of the computation
+
+        Raises:
+            IdempotencyConflictError: if the result of the key was computed for other inputs
+        """
+
+        now = time.monotonic()
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None and call.expires is not None and call.expires < now:
+                call = None
+
+            if call is None:
+                call = _Call()
+                self.calls[key] = call
+                self.leaders += 1
+                leader = True
+            else:
+                self.followers += 1
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+        else:
+            try:
+                # the inputs are kept with the result, for the callers of the same key
+                call.result = self._run_shared(key, lambda: (inputs, fn()), ttl)
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                with self.lock:
+                    if ttl > 0 and call.error is None:
+                        call.expires = time.monotonic() + ttl
+                        self._sweep_calls()
+                    else:
+                        del self.calls[key]
+                call.event.set()
+
+        computed_inputs, result = call.result
+        if computed_inputs != inputs:
+            raise IdempotencyConflictError(f"the key {key} was used for other inputs")
+        return result
+
+    def _sweep_calls(self):
+        """
+        Forget the finished computations whose results have expired
+        """
+
+        now = time.monotonic()
+        expired = [
+            key
+            for key, call in self.calls.items()
+            if call.expires is not None and call.expires < now
+        ]
+        for key in expired:
+            del self.calls[key]
+
+    def _run_shared(self, key, fn, ttl):
+        """
+        Run the computation while holding the lock of the key shared by the workers
+
+        Parameters:
+            key: key identifying the computation
+            fn: function without arguments that computes the result
+            ttl: seconds the result is kept after it is computed
+
+        Returns:
+            result: the result computed by this or another worker
+        """
+
+        if not self.directory:
+            return fn()
+
+        if time.time() - self.last_sweep > self.sweep_interval:
+            self.last_sweep = time.time()
+            self._sweep_results()
+
+        lock_path = os.path.join(self.directory, f"{key}.lock")
+        wait_path = os.path.join(self.directory, f"{key}.wait")
+        result_path = os.path.join(self.directory, f"{key}.result")
+
+        with self._lock_key(lock_path, wait_path) as lock_file:
+            try:
+                found, result = self._read_result(result_path)
+                if found:
+                    return result
+
+                result = fn()
+                if ttl > 0 or os.path.exists(wait_path):
+                    self._write_result(
+                        result_path, result, time.time() + max(ttl, self.share_window)
+                    )
+                    self._remove(wait_path)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _lock_key(self, lock_path, wait_path):
+        """
+        Lock the lock file of a key, marking the wait when another worker holds it
+
+        The sweep may remove the lock file while a worker waits on it, so the lock
+        is taken again when the locked file is no longer the one at the path.
+
+        Parameters:
+            lock_path: path of the lock file of the key
+            wait_path: path of the file marking that a follower waits for the result
+
+        Returns:
+            lock_file: the open lock file, locked by this worker
+        """
+
+        while True:
+            lock_file = open(lock_path, "a+b")
+            try:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # another worker leads the key, wait for it to share its result
+                    open(wait_path, "ab").close()
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                if _same_file(lock_file, lock_path):
+                    return lock_file
+            except BaseException:
+                lock_file.close()
+                raise
+
+            # closing the file releases the lock of the removed file
+            lock_file.close()
+
+    def _read_result(self, result_path):
+        """
+        Read a result shared by another worker, the modification time of the file is its expiry
+
+        Parameters:
+            result_path: path of the shared result
+
+        Returns:
+            found: True if an unexpired result was found
+            result: the shared result
+        """
+
+        try:
+            if os.stat(result_path).st_mtime < time.time():
+                os.remove(result_path)
+                return False, None
+
+            with open(result_path, "rb") as f:
+                return True, pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+
+    def _remove(self, path):
+        """
+        Remove a file of the directory, if it still exists
+
+        Parameters:
+            path: path of the file
+        """
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _write_result(self, result_path, result, expires):
+        """
+        Share a result with the other workers
+
+        Parameters:
+            result_path: path of the shared result
+            result: the result of the computation
+            expires: unix time after which the result is no longer shared
+        """
+
+        try:
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, suffix=".tmp", delete=False
+            ) as f:
+                pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+            os.utime(f.name, (expires, expires))
+            os.replace(f.name, result_path)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"SingleFlight._write_result ERROR: {e}")
+
+    def _sweep_results(self):
+        """
+        Remove the expired results shared by the workers, and the lock and wait
+        files of the keys that no worker has computed for a sweep interval
+        """
+
+        now = time.time()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    if entry.name.endswith(".result"):
+                        if entry.stat().st_mtime < now:
+                            os.remove(entry.path)
+                    elif entry.name.endswith((".lock", ".wait")):
+                        if entry.stat().st_mtime < now - self.sweep_interval:
+                            self._remove_idle_lock(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _remove_idle_lock(self, path):
+        """
+        Remove the lock or wait file of a key unless a worker holds its lock
+
+        Parameters:
+            path: path of the file
+        """
+
+        try:
+            lock_file = open(os.path.splitext(path)[0] + ".lock", "rb")
+        except FileNotFoundError:
+            self._remove(path)
+            return
+
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            try:
+                # the file at the path may be a newer lock file than the one opened
+                if _same_file(lock_file, lock_file.name):
+                    self._remove(path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,174 @@
+import io
+import json
+import zlib
+from urllib.parse import unquote
+from werkzeug.wrappers import Request
+from decoders.decoder import DiagramTooLargeError
+
+# the fields of the diagram, with the headers that carry them in a raw upload
+METADATA_HEADERS = {
+    "id": "X-Diagram-Id",
+    "title": "X-Diagram-Title",
+    "pages": "X-Diagram-Pages",
+}
+RAW_MIMETYPES = ("application/octet-stream", "application/xml", "text/xml")
+CONTENT_ENCODINGS = ("identity", "gzip", "x-gzip")
+
+
+class UploadError(Exception):
+    """
+    The request body is not a diagram upload, its message is reported to the client
+    """
+
+    def __init__(self, message, status=400):
+        """
+        Parameters:
+            message: the error reported to the client
+            status: the HTTP status of the response
+        """
+
+        super().__init__(message)
+        self.status = status
+
+
+def read_body(request, max_bytes, chunk_size=64 * 1024):
+    """
+    Read the request body, decompressing a gzip Content-Encoding a chunk at a time
+
+    Parameters:
+        request: the Flask request
+        max_bytes: maximum size of the body, after the decompression
+        chunk_size: number of bytes that are read and decompressed at a time
+
+    Returns:
+        body: the bytes of the body
+
+    Raises:
+        DiagramTooLargeError: if the body is over the size limit
+        UploadError: if the Content-Encoding is not supported or the gzip body is invalid
+    """
+
+    encoding = request.headers.get("Content-Encoding", "identity").strip().lower()
+    if encoding not in CONTENT_ENCODINGS:
+        raise UploadError(f"Unsupported Content-Encoding {encoding}", 415)
+
+    too_large = DiagramTooLargeError(f"the upload has more than {max_bytes} bytes")
+    if encoding == "identity" and (request.content_length or 0) > max_bytes:
+        raise too_large
+
+    decompressor = None
+    if encoding != "identity":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    body = bytearray()
+    try:
+        while True:
+            data = request.stream.read(chunk_size)
+            if not data:
+                break
+            if decompressor is None:
+                body += data
+                if len(body) > max_bytes:
+                    raise too_large
+                continue
+
+            # decompress at most a chunk at a time, to stop a gzip bomb at the limit
+            while data:
+                if decompressor.eof:
+                    raise UploadError("Unexpected data after the gzip body")
+                body += decompressor.decompress(data, chunk_size)
+                data = decompressor.unconsumed_tail or decompressor.unused_data
+                if len(body) > max_bytes:
+                    raise too_large
+
+        if decompressor is not None:
+            body += decompressor.flush()
+            if not decompressor.eof:
+                raise UploadError("Truncated gzip body")
+    except zlib.error as e:
+        raise UploadError(f"Invalid gzip body: {e}")
+
+    if len(body) > max_bytes:
+        raise too_large
+    return bytes(body)
+
+
+def read_upload(request, max_bytes):
+    """
+    Read the diagram of the request and its metadata
+
+    The diagram is the "data" field of a JSON body, the "file" (or "data") field
+    of a multipart form, or the whole body of a raw upload, with the metadata in
+    the X-Diagram-* headers. Every body can be sent with Content-Encoding: gzip.
+
+    Parameters:
+        request: the Flask request
+        max_bytes: maximum size of the body, after the decompression
+
+    Returns:
+        encoded_xml: encoded .drawio file content, text or bytes
+        metadata: dictionary of the id, the title and the pages option, None if missing
+
+    Raises:
+        DiagramTooLargeError: if the body is over the size limit
+        UploadError: if the body is not a diagram upload
+    """
+
+    body = read_body(request, max_bytes)
+
+    if request.is_json:
+        try:
+            fields = json.loads(body)
+        except ValueError:
+            raise UploadError("Invalid JSON body")
+        if not isinstance(fields, dict) or not isinstance(fields.get("data"), str):
+            raise UploadError("No data provided")
+
+        return fields["data"], {key: fields.get(key) for key in METADATA_HEADERS}
+
+    if request.mimetype == "multipart/form-data":
+        # parse the form from the decompressed body
+        environ = dict(request.environ)
+        environ.pop("HTTP_CONTENT_ENCODING", None)
+        environ.update(
+            {"wsgi.input": io.BytesIO(body), "CONTENT_LENGTH": str(len(body))}
+        )
+        form_request = Request(environ)
+
+        upload = form_request.files.get("file")
+        encoded_xml = upload.read() if upload else form_request.form.get("data")
+        if not encoded_xml:
+            raise UploadError("No data provided")
+
+        metadata = _header_metadata(request)
+        for key in METADATA_HEADERS:
+            metadata[key] = form_request.form.get(key, metadata[key])
+        return encoded_xml, metadata
+
+    if request.mimetype in RAW_MIMETYPES:
+        if not body:
+            raise UploadError("No data provided")
+
+        return body, _header_metadata(request)
+
+    raise UploadError(f"Unsupported Content-Type {request.mimetype}", 415)
+
+
+def _header_metadata(request):
+    """
+    Get the metadata of a raw upload, the values are percent-encoded for the
+    characters that are not allowed in the headers
+
+    Parameters:
+        request: the Flask request
+
+    Returns:
+        metadata: dictionary of the id, the title and the pages option, None if missing
+    """
+
+    metadata = dict()
+    for key, header in METADATA_HEADERS.items():
+        value = request.headers.get(header)
+        metadata[key] = unquote(value) if value is not None else None
+
+    return metadata
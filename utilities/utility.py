@@ -1,4 +1,6 @@
+import io
 import json
+import zipfile
 
 
 def read_file(file_name):
@@ -13,3 +15,83 @@ def save_to_file(file_name, data):
 
 def json_to_file(file_name, data):
     save_to_file(file_name, json.dumps(data, indent=2))
+
+
+def files_to_zip(files):
+    """
+    Pack files into an in-memory zip archive
+
+    Parameters:
+        files: list of [file_name, file_contents] pairs
+
+    Returns:
+        archive: file-like object positioned at the start of the archive
+    """
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for file_name, file_contents in files:
+            zip_file.writestr(file_name, file_contents)
+
+    archive.seek(0)
+    return archive
+
+
+def zip_to_files(archive):
+    """
+    Unpack the files of a zip archive
+
+    Parameters:
+        archive: bytes of the zip archive
+
+    Returns:
+        files: list of [file_name, file_contents] pairs
+    """
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        return [[name, zip_file.read(name)] for name in zip_file.namelist()]
+
+
+def archive_folder(folders, names, suffix):
+    """
+    Get a unique folder name of a zip archive, that is extracted inside the archive
+
+    Parameters:
+        folders: set of the folder names of the archive, the new name is added to it
+        names: the names to be used, the first safe one is taken, like the title and the id
+        suffix: text that separates a name from the same name taken before, and the name if none is safe
+
+    Returns:
+        folder: the folder name
+    """
+
+    suffix = _folder(suffix) or "_"
+    folder = next((_folder(name) for name in names if _folder(name)), suffix)
+
+    unique, n = folder, 1
+    while unique in folders:
+        unique = f"{folder}-{suffix}" if n == 1 else f"{folder}-{suffix}-{n}"
+        n += 1
+
+    folders.add(unique)
+    return unique
+
+
+def _folder(name):
+    """
+    Get a folder name without the path separators
+
+    Parameters:
+        name: the name, None if missing
+
+    Returns:
+        folder: the name with the separators replaced, None if it is not safe
+    """
+
+    if name is None:
+        return None
+
+    folder = str(name).replace("/", "_").replace("\\", "_").replace("\0", "_")
+    folder = folder.strip()
+    # empty, "." and ".." would not stay inside the folder of the archive
+    return folder if folder.strip(".") else None